@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Answer Throughput Benchmark
+
+Measures answer_dataset throughput against the local mock LLM server, for the
+sequential path and for the concurrent asyncio path at several concurrency
+limits. No real model is needed; requires an existing index
+(`python -m src index .`).
+
+    python benchmarks/answer_throughput.py --latency 0.5 --concurrency 1,4,8
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fire
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.generation.mock_server import start_server  # noqa: E402
+
+
+def main(dataset_file: str = "data/datasets/sample_questions.json",
+         latency: float = 0.5, concurrency=(1, 4, 8), k: int = 10):
+    """Run answer_dataset at each concurrency level and report questions/s"""
+    server = start_server(latency=latency)
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{server.server_port}"
+
+    # Imported after OLLAMA_HOST is set, so the clients pick it up
+    from src.__main__ import RAGSystem
+
+    levels = concurrency if isinstance(concurrency, (tuple, list)) else [concurrency]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for level in levels:
+            # Bypass the response cache so every level hits the server
+            rag = RAGSystem(no_cache=True)
+            start = time.perf_counter()
+            rag.answer_dataset(dataset_file, output_file=f"{tmp}/answers.jsonl",
+                               k=k, concurrency=int(level))
+            elapsed = time.perf_counter() - start
+            with open(f"{tmp}/answers.jsonl") as f:
+                rows.append((int(level), sum(1 for _ in f), elapsed))
+
+    server.shutdown()
+
+    print(f"\nMock latency: {latency}s per request")
+    print(f"{'concurrency':>12}{'questions':>12}{'seconds':>10}{'q/s':>10}{'speedup':>10}")
+    baseline = rows[0][1] / rows[0][2]
+    for level, count, elapsed in rows:
+        rate = count / elapsed
+        print(f"{level:>12}{count:>12}{elapsed:>10.2f}{rate:>10.2f}"
+              f"{rate / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Batching Throughput Benchmark
+
+Measures answer_dataset throughput through the OpenAI-compatible backend
+against the mock server's fake `/v1/completions` endpoint, with micro-batching
+disabled (one prompt per request) and enabled. The fake server has a single
+inference slot, like a local llama.cpp or vLLM server, so each request costs
+a fixed latency plus a small per-prompt cost. Requires an existing index
+(`python -m src index .`).
+
+    python benchmarks/batching_throughput.py --latency 0.2 --concurrency 8
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fire
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.__main__ import RAGSystem  # noqa: E402
+from src.generation.mock_server import start_server  # noqa: E402
+
+
+def main(dataset_file: str = "data/datasets/sample_questions.json",
+         latency: float = 0.2, batch_item_latency: float = 0.01,
+         concurrency: int = 8, batch_window_ms: float = 10, k: int = 10):
+    """Run answer_dataset unbatched and batched and report questions/s"""
+    server = start_server(latency=latency,
+                          batch_item_latency=batch_item_latency)
+    url = f"http://127.0.0.1:{server.server_port}/v1"
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, max_batch_size in (("unbatched", 1), ("batched", 16)):
+            # Bypass the response cache so both runs hit the server
+            rag = RAGSystem(no_cache=True, backend="openai", openai_url=url,
+                            batch_window_ms=batch_window_ms)
+            rag.llm_client.max_batch_size = max_batch_size
+            start = time.perf_counter()
+            rag.answer_dataset(dataset_file, output_file=f"{tmp}/answers.jsonl",
+                               k=k, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            with open(f"{tmp}/answers.jsonl") as f:
+                rows.append((label, sum(1 for _ in f),
+                             rag.llm_client.batches, elapsed))
+
+    server.shutdown()
+
+    print(f"\nMock latency: {latency}s per request + {batch_item_latency}s "
+          f"per prompt, concurrency {concurrency}")
+    print(f"{'mode':>12}{'questions':>12}{'requests':>10}{'seconds':>10}"
+          f"{'q/s':>10}{'speedup':>10}")
+    baseline = rows[0][1] / rows[0][3]
+    for label, count, batches, elapsed in rows:
+        rate = count / elapsed
+        print(f"{label:>12}{count:>12}{batches:>10}{elapsed:>10.2f}"
+              f"{rate:>10.2f}{rate / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
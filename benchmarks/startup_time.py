@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+CLI Startup Time Benchmark
+
+Measures the cold-start cost of the CLI with `python -X importtime`: the
+cumulative import time of `src.__main__` (best of several fresh
+interpreters) with its slowest imports, and the wall time of a scripted
+single query when an index exists. It fails when the import budget is
+exceeded or when a module that only some commands need (the LLM client
+library, pydantic, tqdm, asyncio, ...) is imported at module load again,
+which is the regression that matters and does not depend on machine speed.
+
+    python benchmarks/startup_time.py --budget_ms 50
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fire
+
+ROOT = Path(__file__).resolve().parent.parent
+# Must not be imported by `import src.__main__`; commands import them lazily
+DEFERRED = ('ollama', 'httpx', 'pydantic', 'tqdm', 'asyncio', 'fire',
+            'multiprocessing', 'http.server', 'orjson', 'cProfile')
+
+
+def import_times(module: str = "src.__main__") -> dict:
+    """{module name: cumulative microseconds} of the imports done by
+    `import module` in a fresh interpreter, interpreter startup excluded"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    pending = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Children are listed before their parent, indented two per level
+        pending.append((name.strip(), int(cumulative)))
+        if not name[1:].startswith(" "):
+            if name.strip() == module:
+                return dict(pending)
+            pending = []
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def command_time(args: list) -> float:
+    """Wall seconds of one CLI invocation
+
+    Runs in a temporary directory that links to this repo's index, so the
+    output the command writes (data/output/...) does not overwrite the
+    tracked results.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        (Path(workdir) / "data").mkdir()
+        (Path(workdir) / "data/indexes").symlink_to(ROOT / "data/indexes")
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "src", *args], cwd=workdir,
+                       env=env, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+        return time.perf_counter() - start
+
+
+def main(runs: int = 5, budget_ms: float = 50.0, top: int = 10,
+         query: str = "How does BM25 scoring work?"):
+    """Report import and single-query startup; exit 1 over budget"""
+    samples = [import_times() for _ in range(runs)]
+    best = min(samples, key=lambda times: times["src.__main__"])
+    total_ms = best["src.__main__"] / 1000
+
+    print(f"import src.__main__: {total_ms:.1f} ms (best of {runs}, median "
+          f"{statistics.median(t['src.__main__'] for t in samples) / 1000:.1f} ms)")
+    print("Slowest imports:")
+    slowest = sorted((item for item in best.items() if item[0] != "src.__main__"),
+                     key=lambda item: -item[1])
+    for name, micros in slowest[:top]:
+        print(f"  {micros / 1000:>8.1f} ms  {name}")
+
+    if (ROOT / "data/indexes/chunks.json").exists():
+        wall = [command_time(["search", query]) for _ in range(runs)]
+        print(f"python -m src search: {min(wall) * 1000:.0f} ms wall "
+              f"(best of {runs}, median {statistics.median(wall) * 1000:.0f} ms)")
+    else:
+        print("No index; skipping the single-query timing")
+
+    failures = [f"{name} is imported at startup" for name in DEFERRED
+                if name in best]
+    if total_ms > budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds the "
+                        f"{budget_ms:g} ms budget")
+    if failures:
+        print("STARTUP REGRESSIONS:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"Within budget ({budget_ms:g} ms, no deferred modules imported)")
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
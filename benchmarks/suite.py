@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmark Suite
+
+Generates synthetic repositories (see synthetic_repo.py) and measures, for
+each size: indexing time, index size on disk and peak RSS while indexing,
+then for every retriever mode: index load time, query latency p50/p95/p99,
+QPS, recall@10 against the generated ground truth and peak RSS. Each phase
+runs in a fresh process so load time and RSS are not skewed by earlier
+phases.
+
+Results are written as JSON and compared with a stored baseline; any metric
+worse than the baseline by more than the tolerance is flagged and the run
+exits non-zero. A run whose settings (queries, seed, file mix, CPU count)
+differ from the baseline's is refused rather than compared. Timings are
+machine-specific, so regenerate the baseline on the machine that runs the
+comparison:
+
+    python benchmarks/suite.py --sizes small,medium --update_baseline
+    python benchmarks/suite.py --sizes small,medium
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+import fire
+
+BENCHMARKS = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS.parent))
+sys.path.insert(0, str(BENCHMARKS))
+
+from synthetic_repo import generate_repo  # noqa: E402
+
+SIZES = {'small': 100, 'medium': 1000, 'large': 5000}
+MODES = {
+    'exact': {},
+    'fast': {'fast': True},
+    'rerank': {'rerank': True},
+    'expand': {'expand': True},
+}
+# Metrics where larger is better; every other metric is a cost
+HIGHER_IS_BETTER = {'qps', 'recall@10'}
+# Run settings that must match the baseline's for a comparison to mean anything
+COMPARABLE_META = ('queries', 'seed', 'mix', 'cpus')
+# Absolute changes below these are timer or allocator noise, by unit suffix
+NOISE_FLOOR = {'_ms': 0.5, '_s': 0.05, '_mb': 2.0}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _index_phase(workdir: str) -> dict:
+    os.chdir(workdir)
+    from src.indexing.indexer import RepositoryIndexer
+
+    with open(os.devnull, 'w') as devnull, \
+            redirect_stdout(devnull), redirect_stderr(devnull):
+        start = time.perf_counter()
+        RepositoryIndexer().index_repository("repo", tiered=True)
+        elapsed = time.perf_counter() - start
+
+    size = sum(f.stat().st_size for f in Path("data/indexes").iterdir())
+    return {'index_s': elapsed, 'index_mb': size / 1e6,
+            'index_peak_rss_mb': _peak_rss_mb()}
+
+
+def _query_phase(workdir: str, options: dict, warmup: int = 5) -> dict:
+    os.chdir(workdir)
+    from src.__main__ import RAGSystem
+    from src.evaluation.metrics import evaluate_results
+
+    with open("questions.json") as f:
+        questions = json.load(f)['rag_questions']
+
+    rag = RAGSystem(no_cache=True)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        rag._load_index()
+        load = time.perf_counter() - start
+
+    for q in questions[:warmup]:
+        rag._retrieve(q['question'], 10, **options)
+
+    latencies, retrieved = [], {}
+    start = time.perf_counter()
+    for q in questions:
+        query_start = time.perf_counter()
+        results = rag._retrieve(q['question'], 10, **options)
+        latencies.append(time.perf_counter() - query_start)
+        retrieved[q['question_id']] = rag._format_sources(results)
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    truth = {q['question_id']: q['sources'] for q in questions}
+    return {
+        'load_s': load,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p95_ms': _percentile(latencies, 95) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+        'qps': len(questions) / total,
+        'recall@10': evaluate_results(retrieved, truth)['recall@10'],
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * pct / 100),
+                             len(sorted_values) - 1)]
+
+
+def _in_child(target, *args) -> dict:
+    """Run target in a fresh interpreter and return its result"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(1, mp_context=context) as pool:
+        return pool.submit(target, *args).result()
+
+
+def run_suite(sizes: str = "small", modes: str = ",".join(MODES),
+              queries: int = 200, seed: int = 0,
+              mix: str = "py=0.6,md=0.3,txt=0.1") -> dict:
+    """Benchmark every size and retriever mode; returns the results dict"""
+    sizes = sizes.split(",") if isinstance(sizes, str) else list(sizes)
+    modes = modes.split(",") if isinstance(modes, str) else list(modes)
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            repo = generate_repo(os.path.join(workdir, "repo"),
+                                 files=SIZES[size], mix=mix,
+                                 questions=queries, seed=seed)
+            print(f"[{size}] {SIZES[size]} files, {repo['bytes'] / 1e6:.1f} MB,"
+                  f" {repo['definitions']} definitions")
+            # The indexer records paths as given, like the ground truth
+            _relative_sources(workdir)
+
+            entry = {'index': _in_child(_index_phase, workdir), 'modes': {}}
+            for mode in modes:
+                entry['modes'][mode] = _in_child(_query_phase, workdir,
+                                                 MODES[mode])
+            results[size] = entry
+    return results
+
+
+def _relative_sources(workdir: str):
+    """Rewrite ground-truth paths relative to workdir ('repo/...')"""
+    dataset_file = os.path.join(workdir, "questions.json")
+    with open(dataset_file) as f:
+        dataset = json.load(f)
+    for question in dataset['rag_questions']:
+        for source in question['sources']:
+            source['file_path'] = os.path.relpath(source['file_path'], workdir)
+    with open(dataset_file, 'w') as f:
+        json.dump(dataset, f)
+
+
+def flatten(results: dict) -> dict:
+    """{'small/index/index_s': 1.2, 'small/exact/p50_ms': 3.4, ...}"""
+    flat = {}
+    for size, entry in results.items():
+        for metric, value in entry['index'].items():
+            flat[f"{size}/index/{metric}"] = value
+        for mode, metrics in entry['modes'].items():
+            for metric, value in metrics.items():
+                flat[f"{size}/{mode}/{metric}"] = value
+    return flat
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25,
+            recall_tolerance: float = 0.01) -> list:
+    """Metrics worse than baseline beyond tolerance, as (key, base, now)"""
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for key, value in current.items():
+        if key not in previous:
+            continue
+        base = previous[key]
+        metric = key.rsplit("/", 1)[1]
+        if metric == 'recall@10':
+            worse = value < base - recall_tolerance
+        elif metric in HIGHER_IS_BETTER:
+            worse = value < base * (1 - tolerance)
+        else:
+            floor = next((f for suffix, f in NOISE_FLOOR.items()
+                          if metric.endswith(suffix)), 0.0)
+            worse = value > base * (1 + tolerance) and value - base > floor
+        if worse:
+            regressions.append((key, base, value))
+    return regressions
+
+
+def mismatched_meta(meta: dict, baseline_meta: dict) -> list:
+    """Run settings that differ from the baseline's, as (key, base, now)"""
+    return [(key, baseline_meta.get(key), meta.get(key))
+            for key in COMPARABLE_META
+            if baseline_meta.get(key) != meta.get(key)]
+
+
+def main(sizes: str = "small", modes: str = ",".join(MODES),
+         queries: int = 200, seed: int = 0,
+         mix: str = "py=0.6,md=0.3,txt=0.1",
+         output: str = str(BENCHMARKS / "results" / "latest.json"),
+         baseline: str = str(BENCHMARKS / "baseline.json"),
+         update_baseline: bool = False, tolerance: float = 0.25):
+    """Run the suite, write results and flag regressions against baseline"""
+    results = run_suite(sizes, modes, queries, seed, mix)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'queries': queries, 'seed': seed, 'mix': mix,
+        },
+        'results': results,
+    }
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'size':<8}{'mode':<8}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'qps':>9}{'recall':>8}{'rss MB':>8}")
+    for size, entry in results.items():
+        index = entry['index']
+        print(f"{size:<8}{'index':<8}{index['index_s']:>8.2f}"
+              f"{'':>36}{'':>8}{index['index_peak_rss_mb']:>8.0f}"
+              f"   ({index['index_mb']:.1f} MB on disk)")
+        for mode, m in entry['modes'].items():
+            print(f"{size:<8}{mode:<8}{m['load_s']:>8.2f}{m['p50_ms']:>9.2f}"
+                  f"{m['p95_ms']:>9.2f}{m['p99_ms']:>9.2f}{m['qps']:>9.0f}"
+                  f"{m['recall@10']:>8.3f}{m['peak_rss_mb']:>8.0f}")
+    print(f"\nResults written to {output}")
+
+    if update_baseline:
+        with open(baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {baseline}")
+        return
+
+    if not Path(baseline).exists():
+        print(f"No baseline at {baseline}; run with --update_baseline")
+        return
+
+    with open(baseline) as f:
+        previous = json.load(f)
+    mismatched = mismatched_meta(report['meta'], previous.get('meta', {}))
+    if mismatched:
+        print(f"Not comparable with {baseline}; run settings differ:")
+        for key, base, value in mismatched:
+            print(f"  {key}: {base} (baseline) vs {value}")
+        print("Rerun with the baseline's settings, or --update_baseline")
+        sys.exit(1)
+    regressions = compare(results, previous['results'], tolerance)
+    if not regressions:
+        print(f"No regressions against {baseline} (tolerance {tolerance:.0%})")
+        return
+    print(f"REGRESSIONS against {baseline} (tolerance {tolerance:.0%}):")
+    for key, base, value in regressions:
+        print(f"  {key}: {base:.4g} -> {value:.4g}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
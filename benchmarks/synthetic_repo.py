@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Synthetic Repository Generator
+
+Writes a reproducible fake code repository of configurable size and file mix
+(Python modules, Markdown docs and plain-text files) together with a question
+dataset whose ground-truth sources point at the generated definitions, so
+indexing, retrieval latency and recall can be benchmarked at any scale
+without depending on a real checkout.
+
+    python benchmarks/synthetic_repo.py /tmp/synth --files 500 --mix py=0.6,md=0.3,txt=0.1
+"""
+
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+import fire
+
+SYLLABLES = ["ba", "co", "de", "fi", "gu", "ha", "ki", "lo", "me", "nu",
+             "po", "ra", "si", "tu", "ve", "xo", "ya", "ze", "qua", "tri"]
+VERBS = ["load", "parse", "build", "merge", "score", "index", "fetch", "write",
+         "split", "render", "check", "encode", "resolve", "compile", "sync"]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'py=0.6,md=0.3,txt=0.1' -> normalized extension weights"""
+    weights = {}
+    for part in mix.split(","):
+        ext, weight = part.split("=")
+        weights[ext.strip().lstrip(".")] = float(weight)
+    total = sum(weights.values())
+    return {ext: weight / total for ext, weight in weights.items()}
+
+
+class SyntheticRepo:
+    def __init__(self, seed: int = 0, vocabulary_size: int = 2000):
+        self.rng = random.Random(seed)
+        words = set()
+        while len(words) < vocabulary_size:
+            words.add("".join(self.rng.choice(SYLLABLES)
+                              for _ in range(self.rng.randint(2, 4))))
+        self.words = sorted(words)
+        self.definitions = []
+
+    def sentence(self, length: int = 10) -> str:
+        return " ".join(self.rng.choice(self.words) for _ in range(length))
+
+    def python_module(self, file_path: str, functions: int) -> str:
+        parts = [f'"""{self.sentence(12)}"""\n\nimport os\nimport json\n\n']
+        offset = len(parts[0])
+        for _ in range(functions):
+            name = f"{self.rng.choice(VERBS)}_{self.rng.choice(self.words)}"
+            topic = self.sentence(6)
+            body = "\n".join(
+                f"    {self.rng.choice(self.words)} = "
+                f"{self.rng.choice(self.words)}({self.rng.choice(self.words)})"
+                for _ in range(self.rng.randint(3, 12)))
+            text = (f"\ndef {name}({self.rng.choice(self.words)}, "
+                    f"{self.rng.choice(self.words)}=None):\n"
+                    f'    """{topic}"""\n{body}\n'
+                    f"    return {self.rng.choice(self.words)}\n")
+            self.definitions.append({
+                'name': name, 'topic': topic, 'file_path': file_path,
+                'first_character_index': offset + 1,
+                'last_character_index': offset + len(text),
+            })
+            parts.append(text)
+            offset += len(text)
+        return "".join(parts)
+
+    def markdown_doc(self, sections: int) -> str:
+        parts = [f"# {self.sentence(3).title()}\n\n{self.sentence(30)}\n"]
+        for _ in range(sections):
+            parts.append(f"\n## {self.sentence(3).title()}\n\n"
+                         f"{self.sentence(self.rng.randint(20, 80))}\n")
+        return "".join(parts)
+
+    def text_file(self, lines: int) -> str:
+        return "\n".join(self.sentence(12) for _ in range(lines)) + "\n"
+
+    def questions(self, count: int) -> List[Dict[str, Any]]:
+        """Questions about generated functions, in four kinds of difficulty
+
+        By exact name; by a misspelled name, found only with typo-tolerant
+        expansion; by two topic words diluted with unrelated words; and by
+        one topic word next to the function's verb, which many functions
+        share. The last two are ambiguous enough that approximate (tiered)
+        search and re-ranking change the results.
+        """
+        picked = self.rng.sample(self.definitions,
+                                 min(count, len(self.definitions)))
+        questions = []
+        for i, definition in enumerate(picked):
+            name, words = definition['name'], definition['topic'].split()
+            kind = i % 4
+            if kind == 0:
+                question = f"What does {name} do?"
+            elif kind == 1:
+                question = f"What does {self.misspell(name)} do?"
+            elif kind == 2:
+                terms = (self.rng.sample(words, 2)
+                         + [self.rng.choice(self.words) for _ in range(3)])
+                self.rng.shuffle(terms)
+                question = f"Where is {' '.join(terms)} handled?"
+            else:
+                verb = name.split("_", 1)[0]
+                question = f"How do we {verb} {self.rng.choice(words)}?"
+            questions.append({
+                'question_id': f"s{i:05d}",
+                'question': question,
+                'sources': [{key: definition[key] for key in (
+                    'file_path', 'first_character_index',
+                    'last_character_index')}],
+            })
+        return questions
+
+    def misspell(self, name: str) -> str:
+        """name with two adjacent letters of its last word swapped"""
+        head, word = name.rsplit("_", 1)
+        i = self.rng.choice([i for i in range(len(word) - 1)
+                             if word[i] != word[i + 1]])
+        return f"{head}_{word[:i]}{word[i + 1]}{word[i]}{word[i + 2:]}"
+
+
+def generate_repo(path: str, files: int = 200,
+                  mix: str = "py=0.6,md=0.3,txt=0.1",
+                  functions_per_file: int = 8, questions: int = 200,
+                  seed: int = 0) -> Dict[str, Any]:
+    """Write the repository under path and questions.json next to it
+
+    File paths in the ground truth are joined onto path exactly as given,
+    matching what the indexer records when it is pointed at the same path.
+    """
+    repo = SyntheticRepo(seed)
+    weights = parse_mix(mix)
+    extensions = list(weights)
+    counts = {ext: 0 for ext in extensions}
+    total_bytes = 0
+
+    for i in range(files):
+        ext = repo.rng.choices(extensions, [weights[e] for e in extensions])[0]
+        directory = os.path.join(path, f"pkg_{i % max(files // 20, 1):03d}")
+        os.makedirs(directory, exist_ok=True)
+        file_path = os.path.join(directory, f"module_{i:05d}.{ext}")
+        if ext == "py":
+            content = repo.python_module(file_path, functions_per_file)
+        elif ext == "md":
+            content = repo.markdown_doc(functions_per_file)
+        else:
+            content = repo.text_file(functions_per_file * 6)
+        with open(file_path, 'w') as f:
+            f.write(content)
+        counts[ext] += 1
+        total_bytes += len(content)
+
+    dataset_file = os.path.join(os.path.dirname(os.path.abspath(path)),
+                                "questions.json")
+    with open(dataset_file, 'w') as f:
+        json.dump({'rag_questions': repo.questions(questions)}, f)
+
+    return {'path': path, 'files': counts, 'bytes': total_bytes,
+            'definitions': len(repo.definitions),
+            'dataset_file': dataset_file}
+
+
+if __name__ == "__main__":
+    fire.Fire(generate_repo)
@@ -1,44 +1,91 @@
 import json
-import fire
+import time
+import atexit
+from collections import OrderedDict
+from contextlib import nullcontext
 from pathlib import Path
-from tqdm import tqdm
 
-from .indexing.indexer import RepositoryIndexer
+# Only what every command needs is imported here. fire, ollama, pydantic,
+# tqdm, asyncio and the dataset, serving and analysis subsystems are imported
+# where they are used, so single queries start fast; see
+# benchmarks/startup_time.py for the budget.
+from .indexing.chunk_store import ChunkStore
+from .indexing.filters import MetadataBitmaps
+from .indexing.symbols import SymbolIndex
 from .retrieval.bm25 import BM25Retriever
+from .retrieval.tiered import TieredIndex
+from .retrieval.reranker import ProximityReranker
 from .generation.llm_client import OllamaClient
-from .models.data_models import *
-from .evaluation.metrics import calculate_recall_at_k, evaluate_dataset_recall
+from .generation.cache import ResponseCache
+from .generation.context import pack_context, estimate_tokens
+from .generation.compression import compress_context
+from .pipeline.deadline import DeadlinePlanner, DeadlineStream
+from .profiling.tracing import TRACER, span
+
+# Candidate lists of this many recent filter expressions are kept, so a
+# long-running server sees bounded memory however many filters it is sent
+FILTER_CACHE_SIZE = 32
 
 
 class RAGSystem:
-    def __init__(self):
-        self.indexer = RepositoryIndexer()
+    def __init__(self, context_tokens: int = 1024, no_cache: bool = False,
+                 warm_up: bool = False, backend: str = "ollama",
+                 openai_url: str = "http://127.0.0.1:8080/v1",
+                 batch_window_ms: float = 10, compress_chars: int = 0,
+                 profile: bool = False, trace_file: str = None,
+                 cprofile_file: str = None, model: str = "qwen3:0.6b"):
+        if profile or trace_file or cprofile_file:
+            self._start_profiling(trace_file, cprofile_file)
         self.retriever = BM25Retriever()
-        self.llm_client = OllamaClient()
-        self.chunks = []
+        cache = None if no_cache else ResponseCache()
+        if backend == "openai":
+            from .generation.openai_backend import OpenAIBackend
+
+            self.llm_client = OpenAIBackend(
+                model=model, base_url=openai_url,
+                context_tokens=context_tokens, cache=cache,
+                batch_window_ms=batch_window_ms)
+        elif backend == "ollama":
+            self.llm_client = OllamaClient(model=model,
+                                           context_tokens=context_tokens,
+                                           cache=cache)
+        else:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.llm_client.compress_chars = compress_chars
+        self.chunks = ChunkStore()
+        self.reranker = ProximityReranker()
+        self.filters = None
+        self.symbols = None
+        self._filter_cache = OrderedDict()
+        self._warned_no_tiers = False
+        self.stage_timings = {}
+        self.warm_up = warm_up
+        self.planner = DeadlinePlanner(max_context_tokens=context_tokens)
 
-    def index(self, repo_path: str = "."):
+    def index(self, repo_path: str = ".", tiered: bool = False):
         """Index the repository"""
+        from .indexing.indexer import RepositoryIndexer
+
         print(f"Indexing repository at: {repo_path}")
-        self.indexer.index_repository(repo_path)
+        RepositoryIndexer().index_repository(repo_path, tiered=tiered)
         print("Indexing complete!")
 
-    def search(self, query: str, k: int = 10):
+    def search(self, query: str, k: int = 10, fast: bool = False,
+               filters: str = None, rerank: bool = False,
+               expand: bool = False, symbols: bool = True):
         """Search the indexed repository"""
+        from .models.data_models import (
+            MinimalSearchResults, StudentSearchResults)
+
         self._load_index()
 
         # Perform search
-        results = self.retriever.search(query, k)
+        results = self._retrieve(query, k, fast=fast, filters=filters,
+                                 rerank=rerank, expand=expand,
+                                 symbols=symbols)
 
         # Convert to required format
-        retrieved_sources = []
-        for doc_idx, score in results:
-            chunk = self.chunks[doc_idx]
-            retrieved_sources.append(MinimalSource(
-                file_path=chunk['file_path'],
-                first_character_index=chunk['start_char'],
-                last_character_index=chunk['end_char']
-            ))
+        retrieved_sources = self._format_sources(results)
 
         search_result = StudentSearchResults(
             search_results=[MinimalSearchResults(
@@ -52,32 +99,52 @@ class RAGSystem:
         output_file = "data/output/search_results/single_query.json"
         Path(output_file).parent.mkdir(parents=True, exist_ok=True)
 
-        with open(output_file, 'w') as f:
-            json.dump(search_result.dict(), f, indent=2)
+        with span("serialize"), open(output_file, 'w') as f:
+            json.dump(search_result.model_dump(), f, indent=2)
 
         print(f"Search results saved to: {output_file}")
         return search_result
 
-    def answer(self, question: str, k: int = 10):
-        """Answer single query with context"""
-        self._load_index()
+    def answer(self, question: str, k: int = 10, fast: bool = False,
+               filters: str = None, rerank: bool = False,
+               expand: bool = False, symbols: bool = True,
+               stream: bool = False, deadline_ms: float = None):
+        """Answer single query with context
+
+        With deadline_ms, retrieval depth, re-ranking and context size are
+        chosen to fit the budget, and generation stops at the deadline.
+        """
+        from .models.data_models import (
+            MinimalAnswer, StudentSearchResultsAndAnswer)
 
-        # Search for relevant chunks
-        results = self.retriever.search(question, k)
-        context_chunks = [self.chunks[doc_idx] for doc_idx, _ in results]
+        self._load_index()
 
-        # Generate answer
-        answer = self.llm_client.generate_answer(question, context_chunks)
+        if deadline_ms:
+            self.llm_client.last_stats = {}
+            if stream:
+                print("Answer: ", end="", flush=True)
+            start = time.perf_counter()
+            results, answer, partial = self._answer_with_deadline(
+                question, k, deadline_ms,
+                dict(fast=fast, filters=filters, expand=expand,
+                     symbols=symbols),
+                on_token=(lambda token: print(token, end="", flush=True))
+                if stream else None)
+            if stream:
+                print()
+            print(f"Deadline: {(time.perf_counter() - start) * 1000:.0f} of "
+                  f"{deadline_ms:.0f} ms used"
+                  + (" (partial answer)" if partial else ""))
+        else:
+            # Search for relevant chunks
+            results = self._retrieve(question, k, fast=fast, filters=filters,
+                                     rerank=rerank, expand=expand,
+                                     symbols=symbols)
+            context_chunks = [self.chunks[doc_idx] for doc_idx, _ in results]
+            answer = self._generate(question, context_chunks, stream)
 
         # Format results
-        retrieved_sources = []
-        for doc_idx, score in results:
-            chunk = self.chunks[doc_idx]
-            retrieved_sources.append(MinimalSource(
-                file_path=chunk['file_path'],
-                first_character_index=chunk['start_char'],
-                last_character_index=chunk['end_char']
-            ))
+        retrieved_sources = self._format_sources(results)
 
         result = StudentSearchResultsAndAnswer(
             search_results=[MinimalAnswer(
@@ -92,18 +159,248 @@ class RAGSystem:
         output_file = "data/output/answers/single_query.json"
         Path(output_file).parent.mkdir(parents=True, exist_ok=True)
 
-        with open(output_file, 'w') as f:
-            json.dump(result.dict(), f, indent=2)
+        with span("serialize"), open(output_file, 'w') as f:
+            json.dump(result.model_dump(), f, indent=2)
 
-        print(f"Answer: {answer}")
+        if not stream:
+            print(f"Answer: {answer}")
+        self._print_generation_stats()
         print(f"Results saved to: {output_file}")
         return result
 
+    def _generate(self, question: str, context_chunks: list,
+                  stream: bool = False) -> str:
+        """Generate an answer, printing tokens live when streaming"""
+        if not stream:
+            return self.llm_client.generate_answer(question, context_chunks)
+        print("Answer: ", end="", flush=True)
+        pieces = []
+        for token in self.llm_client.stream_answer(question, context_chunks):
+            print(token, end="", flush=True)
+            pieces.append(token)
+        print()
+        return "".join(pieces)
+
+    def _print_generation_stats(self):
+        """Print latency figures of the last LLM request"""
+        stats = self.llm_client.last_stats
+        if not stats:
+            return
+        if stats.get('cached'):
+            print("Answer served from the response cache")
+            return
+        if stats['time_to_first_token'] is not None:
+            print(f"Time to first token: "
+                  f"{stats['time_to_first_token'] * 1000:.0f} ms")
+        if stats.get('load_time'):
+            print(f"Model load: {stats['load_time'] * 1000:.0f} ms")
+        if stats.get('prompt_tokens'):
+            print(f"Prompt: {stats['prompt_tokens']} tokens")
+        print(f"Generation: {stats['tokens']} tokens in "
+              f"{stats['total_time']:.2f}s ({stats['tokens_per_sec']:.1f} tokens/s)")
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8000):
+        """Serve search and answer requests over HTTP"""
+        from .serving.query_server import make_server
+
+        self._load_index()
+        self._pin_model()
+        server = make_server(self, host, port)
+        print(f"Query server listening on http://{host}:{port} "
+              f"(POST /search, POST /answer)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down")
+        finally:
+            server.server_close()
+            self._unpin_model()
+
+    def loadtest(self, dataset_file: str, qps: float = 0, clients: int = 4,
+                 duration: float = 30, url: str = None,
+                 endpoint: str = "search", k: int = 10, fast: bool = False,
+                 rerank: bool = False, expand: bool = False,
+                 interval: float = 1.0, output_file: str = None):
+        """Replay dataset questions at a target QPS or with N concurrent clients
+
+        With qps > 0 requests are sent open-loop at that rate by a pool of
+        `clients` threads; otherwise each client sends back-to-back. The
+        target is this process, or the query server at url if given.
+        """
+        from .serving.loadtest import HttpTarget, InProcessTarget, LoadGenerator
+
+        with open(dataset_file, 'r') as f:
+            questions = [q['question'] for q in json.load(f)['rag_questions']]
+        options = {o: True for o, on in
+                   (('fast', fast), ('rerank', rerank), ('expand', expand)) if on}
+        if url:
+            target = HttpTarget(url, endpoint, k, options)
+        else:
+            self._load_index()
+            target = InProcessTarget(self, endpoint, k, options)
+
+        load = (f"{qps:g} qps open-loop over {clients} clients" if qps > 0
+                else f"{clients} closed-loop clients")
+        print(f"Load test: {load} for {duration:g}s against "
+              f"{url or 'in-process retriever'} (/{endpoint})")
+        print(f"{'t s':>6}{'qps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+              f"{'errors':>8}{'proc cpu':>10}{'sys cpu':>9}")
+
+        def on_interval(row):
+            print(f"{row['t']:>6.1f}{row['qps']:>8.1f}"
+                  f"{_ms(row['p50_ms']):>9}{_ms(row['p95_ms']):>9}"
+                  f"{_ms(row['p99_ms']):>9}{row['errors']:>8}"
+                  f"{row['process_cpu']:>9.0f}%"
+                  + (f"{row['system_cpu']:>8.0f}%"
+                     if row['system_cpu'] is not None else f"{'-':>9}"))
+
+        generator = LoadGenerator(target, questions, qps, clients, duration,
+                                  interval)
+        summary = generator.run(on_interval)
+
+        print(f"\n{summary['requests']} requests in "
+              f"{summary['duration_s']:.1f}s: {summary['throughput']:.1f} req/s")
+        if summary['requests']:
+            print("Latency: " + ", ".join(
+                f"{name} {_ms(summary[f'{name}_ms'])} ms"
+                for name in ('p50', 'p90', 'p95', 'p99', 'max')))
+            print(f"Errors: {summary['errors']} "
+                  f"({summary['error_rate'] * 100:.2f}%)" + "".join(
+                      f", {error}: {count}"
+                      for error, count in summary['errors_by_type'].items()))
+
+        if output_file:
+            with open(output_file, 'w') as f:
+                json.dump({'summary': summary,
+                           'timeline': generator.timeline}, f, indent=2)
+            print(f"Load test report saved to {output_file}")
+
+    def _answer_with_deadline(self, question: str, k: int, deadline_ms: float,
+                              options: dict, on_token=None,
+                              retrieval_lock=None):
+        """Retrieve and generate within deadline_ms
+
+        Returns (results, answer, partial). Sources are always complete;
+        the answer is cut off, or empty, when the deadline arrives first.
+        """
+        start = time.perf_counter()
+        deadline = start + deadline_ms / 1000
+        plan = self.planner.plan(deadline_ms)
+        # Tiers are only used when prebuilt (index --tiered); building them
+        # on demand would cost far more than the exact search it replaces
+        fast = options.get('fast', False) or (
+            plan['fast'] and self.retriever.tiers is not None)
+
+        with retrieval_lock or nullcontext():
+            results = self._retrieve(question, k,
+                                     **dict(options, fast=fast,
+                                            rerank=plan['rerank']))
+            timings = dict(self.stage_timings)
+        if 'first_stage' in timings:
+            self.planner.observe('fast_first_stage' if fast else 'first_stage',
+                                 timings['first_stage'] * 1000)
+        if 'rerank' in timings:
+            self.planner.observe('rerank', timings['rerank'] * 1000)
+
+        # Size the context to the time actually left
+        remaining = (deadline - time.perf_counter()) * 1000
+        context_tokens = self.planner.context_tokens(remaining)
+        if not context_tokens:
+            return results, "", True
+
+        context_chunks = pack_context(
+            [self.chunks[doc_idx] for doc_idx, _ in results], context_tokens)
+        prompt_tokens = sum(estimate_tokens(c['content'])
+                            for c in context_chunks)
+
+        pieces, partial = [], False
+        generation_start = time.perf_counter()
+        first_token = None
+        stream = DeadlineStream(
+            self.llm_client.stream_answer(question, context_chunks), deadline)
+        try:
+            for token in stream:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                pieces.append(token)
+                if on_token:
+                    on_token(token)
+                # Stop if the next token is not expected before the deadline
+                next_token = self.planner.estimates['per_answer_token'] / 1000
+                if time.perf_counter() + next_token > deadline:
+                    partial = True
+                    break
+        finally:
+            stream.close()
+        partial = partial or stream.expired
+
+        end = time.perf_counter()
+        if first_token is not None or partial:
+            # Without a first token the wait so far is a lower bound
+            waited = (first_token or end) - generation_start
+            self.planner.observe(
+                'first_token_per_context_token',
+                waited * 1000 / max(prompt_tokens, 1))
+            if len(pieces) > 1:
+                self.planner.observe(
+                    'per_answer_token',
+                    (end - first_token) * 1000 / (len(pieces) - 1))
+        return results, "".join(pieces), partial
+
+    def _start_profiling(self, trace_file: str = None,
+                         cprofile_file: str = None):
+        """Trace pipeline stages until exit, then report where time went"""
+        TRACER.enable()
+        profiler = None
+        if cprofile_file:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        def report():
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(cprofile_file)
+            TRACER.print_summary()
+            if trace_file:
+                TRACER.export_chrome_trace(trace_file)
+                print(f"Chrome trace written to {trace_file}")
+            if profiler:
+                import pstats
+
+                print(f"cProfile stats written to {cprofile_file}")
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+
+        atexit.register(report)
+
+    def _pin_model(self):
+        """Pre-load the model and keep it resident while warm_up is set"""
+        if not self.warm_up:
+            return
+        try:
+            load = self.llm_client.warm_up()
+            print(f"Model warm-up: {self.llm_client.model} loaded in "
+                  f"{load * 1000:.0f} ms, pinned for this run")
+        except Exception as e:
+            print(f"Model warm-up failed: {e}")
+
+    def _unpin_model(self):
+        if self.warm_up:
+            self.llm_client.release()
+
     def _load_index(self):
         """Load saved index"""
+        with span("index_load"):
+            self._read_index()
+
+    def _read_index(self, on_loaded=None):
+        """Read every index file; on_loaded(component) follows each one"""
+        loaded = on_loaded or (lambda component: None)
         try:
             with open("data/indexes/chunks.json", 'r') as f:
-                self.chunks = json.load(f)
+                self.chunks = ChunkStore.from_chunks(json.load(f))
+            loaded('chunks')
 
             with open("data/indexes/bm25_index.json", 'r') as f:
                 index_data = json.load(f)
@@ -115,115 +412,666 @@ class RAGSystem:
             self.retriever.avgdl = index_data['avgdl']
             self.retriever.k1 = index_data['k1']
             self.retriever.b = index_data['b']
+            loaded('bm25')
 
             # Retokenize documents (in production, you'd save this too)
             self.retriever.documents = self.chunks
             tokenized_docs = []
-            for chunk in self.chunks:
-                tokens = self.retriever._tokenize(chunk['content'])
-                tokenized_docs.append(tokens)
+            with span("tokenize"):
+                for chunk in self.chunks:
+                    tokens = self.retriever._tokenize(chunk['content'])
+                    tokenized_docs.append(tokens)
             self.retriever.tokenized_docs = tokenized_docs
+            loaded('tokenized_docs')
+
+            filters_file = Path("data/indexes/filters.json")
+            if filters_file.exists():
+                with open(filters_file, 'r') as f:
+                    self.filters = MetadataBitmaps.from_dict(json.load(f))
+            else:
+                self.filters = MetadataBitmaps()
+                self.filters.build(self.chunks)
+            self._filter_cache = OrderedDict()
+            loaded('filters')
+
+            symbols_file = Path("data/indexes/symbols.json")
+            if symbols_file.exists():
+                with open(symbols_file, 'r') as f:
+                    self.symbols = SymbolIndex.from_dict(json.load(f))
+            else:
+                self.symbols = SymbolIndex()
+                self.symbols.build(self.chunks)
+            loaded('symbols')
+
+            tiered_file = Path("data/indexes/tiered_index.json")
+            if tiered_file.exists():
+                with open(tiered_file, 'r') as f:
+                    self.retriever.tiers = TieredIndex.from_dict(json.load(f))
+                loaded('tiers')
 
         except FileNotFoundError:
             print("No index found. Please run 'uv run python -m src index' first.")
             raise
 
-    def search_dataset(self, dataset_file: str, output_file: str = None, k: int = 10):
-        """Process dataset for search evaluation"""
+    def _retrieve(self, query: str, k: int, fast: bool = False,
+                  filters: str = None, rerank: bool = False,
+                  expand: bool = False, symbols: bool = True):
+        """Run retrieval for a single query, recording per-stage timings"""
+        self.stage_timings = {}
+        if fast and self.retriever.tiers is None:
+            if not self._warned_no_tiers:
+                print("No tiered index found; using exact search "
+                      "(run 'index --tiered' to enable --fast)")
+                self._warned_no_tiers = True
+            fast = False
+        candidates = None
+        if filters:
+            if filters in self._filter_cache:
+                self._filter_cache.move_to_end(filters)
+            else:
+                self._filter_cache[filters] = self.filters.candidates(filters)
+                if len(self._filter_cache) > FILTER_CACHE_SIZE:
+                    self._filter_cache.popitem(last=False)
+            candidates = self._filter_cache[filters]
+
+        symbol_hits, definition_only = [], False
+        if symbols and self.symbols:
+            start = time.perf_counter()
+            symbol_hits, definition_only = self.symbols.lookup(query)
+            if candidates is not None:
+                allowed = set(candidates)
+                symbol_hits = [i for i in symbol_hits if i in allowed]
+            self.stage_timings['symbols'] = time.perf_counter() - start
+
+            if symbol_hits and definition_only:
+                # "Where is X defined": the symbol table answers first and
+                # plain BM25 only fills the slots behind the definitions
+                rerank = False
+
+        start = time.perf_counter()
+        depth = max(k, self.reranker.depth) if rerank else k
+        results = self.retriever.search(query, depth, fast=fast,
+                                        candidates=candidates, expand=expand)
+        self.stage_timings['first_stage'] = time.perf_counter() - start
+
+        if rerank:
+            start = time.perf_counter()
+            results = self.reranker.rerank(self.retriever, query, results, k)
+            self.stage_timings['rerank'] = time.perf_counter() - start
+
+        if symbol_hits:
+            # Definitions of named symbols go first, best BM25 match first,
+            # then the ranked results
+            top = (results[0][1] if results else 0.0) + 1.0
+            pinned = self.retriever.search(query, len(symbol_hits),
+                                           candidates=symbol_hits)
+            pinned_ids = {doc_idx for doc_idx, _ in pinned}
+            results = ([(doc_idx, top + score) for doc_idx, score in pinned]
+                       + [r for r in results if r[0] not in pinned_ids])[:k]
+
+        return results
+
+    def search_dataset(self, dataset_file: str, output_file: str = None, k: int = 10,
+                       fast: bool = False, filters: str = None,
+                       rerank: bool = False, expand: bool = False,
+                       symbols: bool = True, validate: bool = True):
+        """Process dataset for search evaluation
+
+        Results are streamed to output_file as they are produced: the
+        StudentSearchResults schema for .json, one record per line for
+        .jsonl. Each record is validated once unless --novalidate is given.
+        """
+        from tqdm import tqdm
+        from .models.data_models import MinimalSearchResults
+        from .pipeline.result_writer import ResultWriter
+
         self._load_index()
 
         with open(dataset_file, 'r') as f:
             dataset = json.load(f)
 
-        results = []
-        for question_data in tqdm(dataset['rag_questions'], desc="Processing questions"):
-            question = question_data['question']
-            question_id = question_data['question_id']
-
-            # Perform search
-            search_results = self.retriever.search(question, k=k)
-
-            retrieved_sources = []
-            for doc_idx, score in search_results:
-                chunk = self.chunks[doc_idx]
-                retrieved_sources.append({
-                    'file_path': chunk['file_path'],
-                    'first_character_index': chunk['start_char'],
-                    'last_character_index': chunk['end_char']
-                })
-
-            results.append({
-                'question_id': question_id,
-                'retrieved_sources': retrieved_sources
-            })
-
-        output = StudentSearchResults(search_results=results, k=k)
-
         if not output_file:
             output_file = f"data/output/search_results/{Path(dataset_file).stem}.json"
 
-        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(output_file, 'w') as f:
-            json.dump(output.dict(), f, indent=2)
+        with ResultWriter(output_file, k, MinimalSearchResults,
+                          validate) as writer:
+            for question_data in tqdm(dataset['rag_questions'], desc="Processing questions"):
+                question = question_data['question']
+                question_id = question_data['question_id']
+
+                # Perform search
+                search_results = self._retrieve(question, k, fast=fast,
+                                                filters=filters, rerank=rerank,
+                                                expand=expand, symbols=symbols)
+
+                with span("serialize"):
+                    writer.write({
+                        'question_id': question_id,
+                        'retrieved_sources': self._format_sources(search_results)
+                    })
 
         print(f"Results saved to: {output_file}")
-        return output
 
-    def answer_dataset(self, dataset_file: str, output_file: str = None, k: int = 10):
-        """Process dataset for answer generation"""
+    def answer_dataset(self, dataset_file: str, output_file: str = None, k: int = 10,
+                       fast: bool = False, filters: str = None,
+                       rerank: bool = False, expand: bool = False,
+                       symbols: bool = True, concurrency: int = 1,
+                       resume: bool = True, dedup: float = 0,
+                       validate: bool = True):
+        """Process dataset for answer generation
+
+        Answers are checkpointed to <output>.checkpoint.jsonl as they
+        complete; an interrupted run picks up where it stopped unless
+        --noresume is given. With dedup set to a similarity threshold in
+        (0, 1], near-duplicate questions share one generated answer. The
+        output is streamed in dataset order, as for search_dataset, from the
+        checkpoint, so answers are not held in memory.
+        """
+        import asyncio
+        from tqdm import tqdm
+        from .models.data_models import MinimalAnswer
+        from .pipeline.checkpoint import AnswerCheckpoint
+        from .pipeline.dedup import cluster_questions
+        from .pipeline.result_writer import ResultWriter
+
         self._load_index()
 
         with open(dataset_file, 'r') as f:
             dataset = json.load(f)
 
-        results = []
-        for question_data in tqdm(dataset['rag_questions'], desc="Generating answers"):
-            question = question_data['question']
-            question_id = question_data['question_id']
+        if not output_file:
+            output_file = f"data/output/answers/{Path(dataset_file).stem}.json"
 
-            # Search for relevant chunks
-            search_results = self.retriever.search(question, k=k)
-            context_chunks = [self.chunks[doc_idx] for doc_idx, _ in search_results]
+        checkpoint = AnswerCheckpoint(
+            Path(output_file).with_suffix(".checkpoint.jsonl"))
+        if not resume:
+            checkpoint.remove()
+        answered = checkpoint.load()
 
-            # Generate answer
-            answer = self.llm_client.generate_answer(question, context_chunks)
-
-            # Format results
-            retrieved_sources = []
-            for doc_idx, score in search_results:
-                chunk = self.chunks[doc_idx]
-                retrieved_sources.append({
-                    'file_path': chunk['file_path'],
-                    'first_character_index': chunk['start_char'],
-                    'last_character_index': chunk['end_char']
-                })
-
-            results.append({
-                'question_id': question_id,
-                'retrieved_sources': retrieved_sources,
+        questions = dataset['rag_questions']
+        pending = [q for q in questions if q['question_id'] not in answered]
+        if answered:
+            print(f"Resuming: {len(questions) - len(pending)} of "
+                  f"{len(questions)} questions already answered "
+                  f"({checkpoint.path})")
+
+        def record(question_data, search_results, answer):
+            # Failed generations are kept for the output and retried on resume
+            checkpoint.append({
+                'question_id': question_data['question_id'],
+                'retrieved_sources': self._format_sources(search_results),
                 'answer': answer
             })
 
-        output = StudentSearchResultsAndAnswer(search_results=results, k=k)
+            # Near-duplicates reuse the answer under their own sources
+            for follower in followers.get(question_data['question_id'], []):
+                record(follower, retrieved[follower['question_id']], answer)
 
-        if not output_file:
-            output_file = f"data/output/answers/{Path(dataset_file).stem}.json"
+        options = dict(fast=fast, filters=filters, rerank=rerank,
+                       expand=expand, symbols=symbols)
+        to_answer, retrieved, followers = pending, {}, {}
+        if dedup:
+            for question_data in tqdm(pending, desc="Retrieving"):
+                retrieved[question_data['question_id']] = self._retrieve(
+                    question_data['question'], k, **options)
+            clusters = cluster_questions(
+                pending, [retrieved[q['question_id']] for q in pending], dedup)
+            to_answer = [pending[cluster[0]] for cluster in clusters]
+            followers = {pending[cluster[0]]['question_id']:
+                         [pending[i] for i in cluster[1:]]
+                         for cluster in clusters}
+            print(f"Near-duplicates: {len(pending)} questions in "
+                  f"{len(clusters)} clusters, {len(pending) - len(clusters)} "
+                  f"LLM calls saved (threshold {dedup})")
 
-        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(output_file, 'w') as f:
-            json.dump(output.dict(), f, indent=2)
+        self._pin_model()
+        start = time.perf_counter()
+
+        try:
+            if concurrency > 1:
+                asyncio.run(self._answer_concurrently(
+                    to_answer, k, options, concurrency,
+                    on_answer=lambda idx, search_results, answer: record(
+                        to_answer[idx], search_results, answer),
+                    retrieved=retrieved))
+            else:
+                for question_data in tqdm(to_answer, desc="Generating answers"):
+                    question = question_data['question']
+
+                    # Search for relevant chunks
+                    search_results = retrieved.get(question_data['question_id'])
+                    if search_results is None:
+                        search_results = self._retrieve(question, k, **options)
+                    context_chunks = [self.chunks[doc_idx] for doc_idx, _ in search_results]
+
+                    # Generate answer
+                    answer = self.llm_client.generate_answer(question, context_chunks)
+                    record(question_data, search_results, answer)
+        finally:
+            checkpoint.close()
+            self._unpin_model()
+
+        elapsed = time.perf_counter() - start
+        print(f"Answered {len(pending)} questions in {elapsed:.2f}s "
+              f"({len(pending) / elapsed:.2f} questions/s)")
+        if self.llm_client.load_time:
+            print(f"Model loading: {self.llm_client.load_time:.2f}s of "
+                  f"{elapsed:.2f}s spent loading the model")
+        if self.llm_client.cache is not None:
+            print(self.llm_client.cache.summary())
+
+        # Write results in dataset order, read back from the checkpoint
+        with span("serialize"), ResultWriter(output_file, k, MinimalAnswer,
+                                             validate) as writer:
+            for q in questions:
+                writer.write(checkpoint.read(q['question_id']))
+        checkpoint.remove()
 
         print(f"Results saved to: {output_file}")
-        return output
 
-    def measure_recall_at_k_on_dataset(self, search_results_file: str, ground_truth_file: str):
-        """Evaluate recall@k on entire dataset"""
-        recall = evaluate_dataset_recall(search_results_file, ground_truth_file)
+    async def _answer_concurrently(self, questions: list, k: int,
+                                   options: dict, concurrency: int,
+                                   on_answer=None, retrieved: dict = None):
+        """Pipeline retrieval ahead of up to `concurrency` LLM requests"""
+        from tqdm import tqdm
+        from .pipeline.async_answering import answer_pipelined
+
+        progress = tqdm(total=len(questions), desc="Generating answers")
+        retrieved = retrieved or {}
+
+        def retrieve(question_data):
+            if question_data['question_id'] in retrieved:
+                return retrieved[question_data['question_id']]
+            return self._retrieve(question_data['question'], k, **options)
+
+        async def generate(question_data, search_results):
+            context_chunks = [self.chunks[doc_idx] for doc_idx, _ in search_results]
+            return await self.llm_client.agenerate_answer(
+                question_data['question'], context_chunks)
+
+        def on_result(idx, search_results, answer):
+            if on_answer:
+                on_answer(idx, search_results, answer)
+            progress.update(1)
+
+        try:
+            return await answer_pipelined(
+                questions, retrieve, generate, concurrency,
+                on_result=on_result)
+        finally:
+            progress.close()
+            await self.llm_client.aclose()
+
+    def _format_sources(self, search_results) -> list:
+        """Convert (doc_idx, score) pairs to retrieved source dicts"""
+        retrieved_sources = []
+        for doc_idx, score in search_results:
+            file_path, start, end = self.chunks.span(doc_idx)
+            retrieved_sources.append({
+                'file_path': file_path,
+                'first_character_index': start,
+                'last_character_index': end
+            })
+        return retrieved_sources
+
+    def index_stats(self, corpus_mb: float = 1000.0):
+        """Report index memory per component, vocabulary, postings and chunk sizes
+
+        Components are sized twice: bytes allocated while loading them
+        (tracemalloc) and bytes they keep resident (deep sizeof). RAM is
+        projected to a corpus of corpus_mb megabytes of source text.
+        """
+        from .profiling.memory import (
+            AllocationMarks, CHUNK_SIZE_BUCKETS, chunk_size_histogram,
+            deep_sizeof, heaps_exponent, postings_distribution, project_bytes)
+
+        with AllocationMarks() as allocations:
+            self._read_index(on_loaded=allocations.mark)
+
+        retriever = self.retriever
+        # Sized with one seen set, vocabulary first: idf and doc_freqs share
+        # their term strings, which are counted once, under idf
+        seen = set()
+        vocabulary = {
+            'idf': deep_sizeof(retriever.idf, seen),
+            'doc_freqs': deep_sizeof(dict(retriever.doc_freqs), seen),
+        }
+        resident = {
+            'chunks': deep_sizeof(self.chunks, seen),
+            'tokenized_docs': deep_sizeof(retriever.tokenized_docs, seen),
+            **vocabulary,
+            'doc_len': deep_sizeof(retriever.doc_len, seen),
+            'filters': deep_sizeof(self.filters, seen),
+            'symbols': deep_sizeof(self.symbols, seen),
+            'tiers': deep_sizeof(retriever.tiers, seen) if retriever.tiers else 0,
+        }
+        # The loader stage each component is allocated in
+        stages = {'idf': 'bm25', 'doc_freqs': 'bm25', 'doc_len': 'bm25'}
+
+        print(f"{'component':<16}{'resident MB':>12}{'loaded MB':>11}")
+        reported = set()
+        for component, size in resident.items():
+            stage = stages.get(component, component)
+            loaded = ('' if stage in reported or stage not in allocations.stages
+                      else f"{allocations.stages[stage] / 1e6:.2f}")
+            reported.add(stage)
+            note = "   (idf, doc_freqs, doc_len)" if stage == 'bm25' and loaded else ""
+            print(f"{component:<16}{size / 1e6:>12.2f}{loaded:>11}{note}")
+        total = sum(resident.values())
+        print(f"{'total':<16}{total / 1e6:>12.2f}"
+              f"{allocations.retained / 1e6:>11.2f}"
+              f"   (load peak {allocations.peak / 1e6:.2f} MB)")
+
+        postings = postings_distribution(retriever.doc_freqs)
+        print(f"\nVocabulary: {postings['terms']} terms, "
+              f"{postings['postings']} postings")
+        if postings['terms']:
+            print(f"Postings per term: median {postings['median']}, "
+                  f"p99 {postings['p99']}, max {postings['max']}")
+            print(f"{'postings/term':<16}{'terms':>9}{'% postings':>12}")
+            for label, (terms, count) in postings['buckets'].items():
+                print(f"{label:<16}{terms:>9}"
+                      f"{count / postings['postings'] * 100:>11.1f}%")
+
+        labels = [f"<={b}" for b in CHUNK_SIZE_BUCKETS]
+        labels.append(f">{CHUNK_SIZE_BUCKETS[-1]}")
+        print(f"\nChunk size (chars)\n{'chunk_type':<16}"
+              + "".join(f"{label:>8}" for label in labels))
+        for chunk_type, counts in sorted(chunk_size_histogram(self.chunks).items()):
+            print(f"{chunk_type:<16}" + "".join(f"{c:>8}" for c in counts))
+
+        # Source size: each file ends where its last chunk ends
+        file_sizes = {}
+        for chunk in self.chunks:
+            file_sizes[chunk['file_path']] = max(
+                file_sizes.get(chunk['file_path'], 0), chunk['end_char'])
+        corpus_bytes = sum(file_sizes.values())
+        if not corpus_bytes:
+            return
+        vocabulary = sum(vocabulary.values())
+        exponent = heaps_exponent(retriever.tokenized_docs)
+        scale = corpus_mb * 1e6 / corpus_bytes
+        projected = project_bytes(total - vocabulary, vocabulary, scale,
+                                  exponent)
+        print(f"\nCorpus: {corpus_bytes / 1e6:.2f} MB of source in "
+              f"{len(file_sizes)} files, {len(self.chunks)} chunks "
+              f"({total / len(self.chunks):.0f} bytes/chunk)")
+        print(f"Projected for {corpus_mb:g} MB of source: "
+              f"{projected / 1e9:.2f} GB (vocabulary grows as "
+              f"corpus^{exponent:.2f})")
+
+    def sweep(self, repo_path: str, dataset_file: str,
+              k1_values="0.9,1.2,1.5,2.0", b_values="0.3,0.5,0.75,0.9",
+              chunk_sizes="1000,2000,4000", k: int = 10, workers: int = None,
+              ground_truth_file: str = None, latency_queries: int = 50):
+        """Recall and latency of BM25 over a grid of k1, b and max_chunk_size
+
+        The repository is chunked and tokenized once per chunk size; every
+        (k1, b) point only reweights the shared postings and is evaluated in
+        a worker process. Latency is measured once per chunk size.
+        """
+        from .indexing.indexer import RepositoryIndexer
+        from .evaluation.sweep import SweepCorpus, search_latencies, sweep_grid
+
+        with open(ground_truth_file or dataset_file, 'r') as f:
+            questions = json.load(f)['rag_questions']
+        truth = {q['question_id']: q['sources']
+                 for q in questions if 'sources' in q}
+        if not truth:
+            print("No ground-truth sources found; pass --ground_truth_file")
+            return
+
+        tokenize = self.retriever._tokenize
+        queries = [(q['question_id'], tokenize(q['question']))
+                   for q in questions]
+        grid = [(k1, b) for k1 in _float_list(k1_values)
+                for b in _float_list(b_values)]
+
+        rows = []
+        for chunk_size in _float_list(chunk_sizes):
+            chunk_size = int(chunk_size)
+            start = time.perf_counter()
+            chunks = RepositoryIndexer(chunk_size).chunk_repository(repo_path)
+            tokenized_docs = [tokenize(c['content']) for c in chunks]
+            corpus = SweepCorpus(chunks, tokenized_docs)
+            latencies = search_latencies(
+                corpus, chunks, tokenized_docs,
+                [q['question'] for q in questions[:latency_queries]], k)
+            del tokenized_docs
+            prepared = time.perf_counter() - start
+
+            start = time.perf_counter()
+            points = sweep_grid(corpus, queries, truth, grid, k, workers)
+            print(f"max_chunk_size {chunk_size}: {len(chunks)} chunks, "
+                  f"prepared in {prepared:.1f}s, {len(grid)} points in "
+                  f"{time.perf_counter() - start:.1f}s")
+            p50 = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[min(int(len(latencies) * 0.95),
+                                len(latencies) - 1)] * 1000
+            for point in points:
+                rows.append({'chunk_size': chunk_size, 'chunks': len(chunks),
+                             'p50_ms': p50, 'p95_ms': p95, **point})
+
+        best = max(rows, key=lambda r: (r['recall@k'], -r['p50_ms']))
+        print(f"\n{'chunk':>6}{'chunks':>8}{'k1':>6}{'b':>6}{'recall':>8}"
+              f"{'r@1':>7}{'mrr':>7}{'ndcg':>7}{'p50 ms':>9}{'p95 ms':>9}")
+        for r in rows:
+            print(f"{r['chunk_size']:>6}{r['chunks']:>8}{r['k1']:>6.2f}"
+                  f"{r['b']:>6.2f}{r['recall@k']:>8.3f}{r['recall@1']:>7.3f}"
+                  f"{r['mrr']:>7.3f}{r['ndcg']:>7.3f}{r['p50_ms']:>9.2f}"
+                  f"{r['p95_ms']:>9.2f}{'  *' if r is best else ''}")
+        print(f"\nBest: max_chunk_size {best['chunk_size']}, k1 {best['k1']:g}, "
+              f"b {best['b']:g} (recall@{k} {best['recall@k']:.4f}, "
+              f"p50 {best['p50_ms']:.2f} ms)")
+
+    def measure_recall_at_k_on_dataset(self, search_results_file: str,
+                                       ground_truth_file: str,
+                                       eval_cache: bool = True):
+        """Evaluate recall@k on entire dataset, with recall@{1,5,10}, MRR and nDCG
+
+        Per-question metrics are cached by a fingerprint of the retrieved and
+        correct sources, so only questions whose results changed are scored.
+        """
+        from .evaluation.metrics import mean_metrics
+
+        start = time.perf_counter()
+        per_question, scored = self._score_run(search_results_file,
+                                               ground_truth_file, eval_cache)
+        metrics = mean_metrics(per_question)
+        elapsed = time.perf_counter() - start
+        recall = metrics['recall@k']
         print(f"Recall@k: {recall:.4f} ({recall*100:.2f}%)")
+        print(", ".join(f"{name}: {metrics[name]:.4f}" for name in
+                        ('recall@1', 'recall@5', 'recall@10', 'mrr', 'ndcg')))
+        print(f"Scored {metrics['questions']} questions in "
+              f"{elapsed * 1000:.1f} ms ({scored} recomputed, "
+              f"{metrics['questions'] - scored} from cache)")
         return recall
 
+    def diff_runs(self, before_file: str, after_file: str,
+                  ground_truth_file: str, metric: str = 'recall@k',
+                  top: int = 10, eval_cache: bool = True):
+        """Report questions that improved or regressed between two runs"""
+        from .evaluation.incremental import diff_runs
+        from .evaluation.metrics import mean_metrics
+
+        before, _ = self._score_run(before_file, ground_truth_file, eval_cache)
+        after, _ = self._score_run(after_file, ground_truth_file, eval_cache)
+        if not before or not after:
+            print("No questions to compare")
+            return
+        if metric not in next(iter(before.values())):
+            raise ValueError(f"Unknown metric {metric!r}, expected one of "
+                             f"{', '.join(next(iter(before.values())))}")
+        diff = diff_runs(before, after, metric)
+
+        with open(ground_truth_file, 'r') as f:
+            questions = {q['question_id']: q['question']
+                         for q in json.load(f)['rag_questions']}
+        old, new = mean_metrics(before), mean_metrics(after)
+        print(f"{metric}: {old[metric]:.4f} -> {new[metric]:.4f} "
+              f"({new[metric] - old[metric]:+.4f})")
+        print(f"{len(diff['improved'])} improved, {len(diff['regressed'])} "
+              f"regressed, {diff['unchanged']} unchanged")
+        if diff['only_before'] or diff['only_after']:
+            print(f"{len(diff['only_before'])} questions only in {before_file}, "
+                  f"{len(diff['only_after'])} only in {after_file}")
+        for title, rows in (("Regressed", diff['regressed']),
+                            ("Improved", diff['improved'])):
+            if not rows:
+                continue
+            print(f"\n{title}:")
+            for question_id, old_value, new_value in rows[:top]:
+                print(f"  {old_value:.3f} -> {new_value:.3f}  {question_id}  "
+                      f"{questions.get(question_id, '')[:60]}")
+            if len(rows) > top:
+                print(f"  ... {len(rows) - top} more")
+
+    def _score_run(self, search_results_file: str, ground_truth_file: str,
+                   eval_cache: bool = True):
+        """Per-question metrics of one run, and how many were recomputed"""
+        from .evaluation.incremental import MetricsCache, evaluate_questions_cached
+        from .evaluation.metrics import evaluate_questions, load_dataset_sources
+
+        retrieved, truth = load_dataset_sources(search_results_file,
+                                                ground_truth_file)
+        if not eval_cache:
+            per_question = evaluate_questions(retrieved, truth)
+            return per_question, len(per_question)
+        cache = MetricsCache()
+        try:
+            return evaluate_questions_cached(retrieved, truth, cache)
+        finally:
+            cache.close()
+
+    def measure_fast_recall(self, dataset_file: str, k: int = 10,
+                            ground_truth_file: str = None):
+        """Compare recall@k and latency of exact and fast (tiered) search"""
+        self._load_index()
+        if self.retriever.tiers is None:
+            start = time.perf_counter()
+            self.retriever.build_tiers()
+            print(f"Built tiers in memory in {time.perf_counter() - start:.2f}s "
+                  f"(use 'index --tiered' to persist them)")
+
+        self._compare_modes(dataset_file, {
+            'exact': {},
+            'fast': {'fast': True},
+        }, k, ground_truth_file)
+
+    def measure_context(self, dataset_file: str, k: int = 10,
+                        compress_chars: int = 600):
+        """Compare prompt context size of packed and first-five-chunk contexts"""
+        self._load_index()
+        with open(dataset_file, 'r') as f:
+            questions = json.load(f)['rag_questions']
+
+        budget = self.llm_client.context_tokens
+        naive_total, packed_total, packed_chunks = 0, 0, 0
+        compressed_total = 0
+        for q in questions:
+            results = self._retrieve(q['question'], k)
+            chunks = [self.chunks[doc_idx] for doc_idx, _ in results]
+            naive_total += sum(estimate_tokens(c['content']) for c in chunks[:5])
+            packed = pack_context(chunks, budget)
+            packed_total += sum(estimate_tokens(c['content']) for c in packed)
+            packed_chunks += len(packed)
+            compressed = compress_context(packed, q['question'], compress_chars)
+            compressed_total += sum(estimate_tokens(c['content'])
+                                    for c in compressed)
+
+        n = len(questions)
+        print(f"First five chunks: {naive_total / n:.0f} context tokens/question")
+        print(f"Packed (budget {budget}): {packed_total / n:.0f} context "
+              f"tokens/question in {packed_chunks / n:.1f} merged spans")
+        print(f"Compressed ({compress_chars} chars/chunk): "
+              f"{compressed_total / n:.0f} context tokens/question")
+        if naive_total:
+            print(f"Reduction: {(1 - packed_total / naive_total) * 100:.1f}% "
+                  f"packed, {(1 - compressed_total / naive_total) * 100:.1f}% "
+                  f"compressed")
+
+    def measure_rerank(self, dataset_file: str, k: int = 10,
+                       depth: int = 200, budget_ms: float = 50.0,
+                       ground_truth_file: str = None):
+        """Compare first-stage BM25 with BM25 plus proximity re-ranking"""
+        self._load_index()
+        self.reranker.depth = depth
+        self.reranker.budget_ms = budget_ms
+
+        self._compare_modes(dataset_file, {
+            'bm25': {},
+            'reranked': {'rerank': True},
+        }, k, ground_truth_file)
+
+    def _compare_modes(self, dataset_file: str, modes: dict, k: int,
+                       ground_truth_file: str = None):
+        """Report recall@k and per-query latency for several retrieval modes
+
+        Recall is measured against the ground-truth sources when available,
+        otherwise against the results of the first mode.
+        """
+        from .evaluation.metrics import evaluate_results
+
+        with open(ground_truth_file or dataset_file, 'r') as f:
+            questions = json.load(f)['rag_questions']
+        truth = {q['question_id']: q['sources']
+                 for q in questions if 'sources' in q}
+
+        runs = {}
+        for name, options in modes.items():
+            sources, latencies, stages = {}, [], {}
+            for q in questions:
+                start = time.perf_counter()
+                results = self._retrieve(q['question'], k, **options)
+                latencies.append(time.perf_counter() - start)
+                for stage, elapsed in self.stage_timings.items():
+                    stages[stage] = stages.get(stage, 0.0) + elapsed
+                sources[q['question_id']] = self._format_sources(results)
+            runs[name] = (sources, latencies,
+                          {s: t / len(questions) for s, t in stages.items()})
+
+        if not truth:
+            reference = next(iter(modes))
+            print(f"No ground-truth sources found; using '{reference}' "
+                  f"results as the reference")
+            truth = runs[reference][0]
+
+        print(f"{'mode':<12}{'recall@' + str(k):>12}{'mrr':>8}{'ndcg':>8}"
+              f"{'mean ms':>12}{'p95 ms':>12}  per-stage mean ms")
+        report = {}
+        for name, (sources, latencies, stages) in runs.items():
+            metrics = evaluate_results(sources, truth)
+            recall = metrics['recall@k']
+            latencies.sort()
+            mean_ms = sum(latencies) / len(latencies) * 1000
+            p95_ms = latencies[int(0.95 * (len(latencies) - 1))] * 1000
+            stage_ms = {s: t * 1000 for s, t in stages.items()}
+            print(f"{name:<12}{recall:>12.4f}{metrics['mrr']:>8.4f}"
+                  f"{metrics['ndcg']:>8.4f}{mean_ms:>12.2f}{p95_ms:>12.2f}  "
+                  + ", ".join(f"{s}={t:.2f}" for s, t in stage_ms.items()))
+            report[name] = {'recall': recall, 'mrr': metrics['mrr'],
+                            'ndcg': metrics['ndcg'], 'mean_ms': mean_ms,
+                            'p95_ms': p95_ms, 'stages_ms': stage_ms}
+        return report
+
+
+def _ms(value) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+def _float_list(value) -> list:
+    """Fire passes '1.2,1.5' as a tuple and '1.5' as a number"""
+    if isinstance(value, str):
+        return [float(v) for v in value.split(",")]
+    if isinstance(value, (list, tuple)):
+        return [float(v) for v in value]
+    return [float(value)]
+
 
 def main():
+    import fire
+
     fire.Fire(RAGSystem)
 
 
@@ -22,6 +22,7 @@ class PythonCodeChunker(BaseChunker):
         chunks = []
         try:
             tree = ast.parse(content)
+            qualified_names = self._qualified_names(tree)
 
             for node in ast.walk(tree):
                 if isinstance(
@@ -45,6 +46,8 @@ class PythonCodeChunker(BaseChunker):
                                 ),
                                 "end_char": len("\n".join(lines[:end_line])),
                                 "chunk_type": "code_block",
+                                "name": node.name,
+                                "qualified_name": qualified_names[node],
                             }
                         )
         except SyntaxError:
@@ -53,6 +56,22 @@ class PythonCodeChunker(BaseChunker):
 
         return chunks or self._simple_split(content, file_path)
 
+    def _qualified_names(self, tree: ast.AST) -> Dict[ast.AST, str]:
+        """Map each definition node to its dotted name, e.g. Class.method"""
+        names = {}
+        definitions = (ast.FunctionDef, ast.ClassDef, ast.AsyncFunctionDef)
+
+        stack = [(tree, "")]
+        while stack:
+            node, prefix = stack.pop()
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, definitions):
+                    names[child] = prefix + child.name
+                    stack.append((child, names[child] + "."))
+                else:
+                    stack.append((child, prefix))
+        return names
+
     def _simple_split(
         self, content: str, file_path: str
     ) -> List[Dict[str, Any]]:  # type: ignore
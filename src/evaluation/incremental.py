@@ -0,0 +1,186 @@
+"""
+Incremental Evaluation Module
+
+This module caches per-question metrics so that re-evaluating a run only
+scores the questions whose results changed. A question's fingerprint hashes
+its retrieved sources in rank order, its ground-truth sources, the cutoffs
+and the overlap threshold, so a change on either side, or in how it is
+scored, misses the cache while unchanged questions are read back. Metrics
+are kept in SQLite next to the LLM response cache, as packed doubles in the
+order of `metric_names`. Entries of an older METRICS_VERSION are dropped when
+the cache is opened, and the cache is bounded: beyond max_entries the least
+recently used entries are evicted. `diff_runs` compares the per-question
+metrics of two runs and lists the questions that improved or regressed.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .metrics import SourceIntervals, evaluate_ranking
+
+# Bump when evaluate_ranking changes, so cached metrics are not reused
+METRICS_VERSION = 1
+# Keys per SELECT, below SQLite's limit on bound parameters
+_BATCH = 500
+# Entries used more recently than this are not marked used again
+TOUCH_SECONDS = 3600
+
+
+def fingerprint(retrieved_sources: List[Dict[str, Any]],
+                correct_sources: List[Dict[str, Any]],
+                ks: Tuple[int, ...], overlap_threshold: float) -> bytes:
+    """Hash of everything that determines one question's metrics
+
+    Sources are hashed as serialized, so the same results written in another
+    order or layout only cost a cache miss.
+    """
+    payload = (METRICS_VERSION, ks, overlap_threshold, retrieved_sources,
+               correct_sources)
+    if orjson is not None:
+        encoded = orjson.dumps(payload)
+    else:
+        encoded = json.dumps(payload, separators=(',', ':')).encode()
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+def metric_names(ks: Tuple[int, ...]) -> List[str]:
+    """Names of the metrics evaluate_ranking returns, in its order"""
+    return [f'recall@{k}' for k in ks] + ['recall@k', 'mrr', 'ndcg']
+
+
+class MetricsCache:
+    def __init__(self, path: str = "data/cache/eval_metrics.sqlite",
+                 max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics ("
+            " key BLOB PRIMARY KEY,"
+            " metrics BLOB NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " last_used REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS metrics_lru ON metrics (last_used)")
+        # Keys embed the version, so older entries can never hit again
+        self._conn.execute("DELETE FROM metrics WHERE version != ?",
+                           (METRICS_VERSION,))
+        self._conn.commit()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        """Cached metrics of the keys that are present"""
+        found = {}
+        now = time.time()
+        for i in range(0, len(keys), _BATCH):
+            batch = keys[i:i + _BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(
+                "SELECT key, metrics FROM metrics WHERE key IN "
+                f"({placeholders})", batch).fetchall()
+            if rows:
+                # Recency at TOUCH_SECONDS granularity, so evaluation loops
+                # re-reading the same entries do not rewrite them every run
+                self._conn.execute(
+                    "UPDATE metrics SET last_used = ? WHERE last_used < ?"
+                    f" AND key IN ({placeholders})",
+                    [now, now - TOUCH_SECONDS, *batch])
+            found.update(rows)
+        self._conn.commit()
+        return found
+
+    def put_many(self, entries: Dict[bytes, bytes]):
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?)",
+            ((key, metrics, METRICS_VERSION, now)
+             for key, metrics in entries.items()))
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        """Drop least-recently-used entries beyond max_entries"""
+        excess = self._conn.execute(
+            "SELECT COUNT(*) FROM metrics").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM metrics WHERE key IN (SELECT key FROM metrics"
+                " ORDER BY last_used LIMIT ?)", (excess,))
+
+    def close(self):
+        self._conn.close()
+
+
+def evaluate_questions_cached(retrieved: Dict[str, List[Dict[str, Any]]],
+                              truth: Dict[str, List[Dict[str, Any]]],
+                              cache: MetricsCache,
+                              ks: Iterable[int] = (1, 5, 10),
+                              overlap_threshold: float = 0.05
+                              ) -> Tuple[Dict[str, Dict[str, float]], int]:
+    """Per-question metrics, scoring only questions missing from the cache
+
+    Returns the metrics by question id and how many questions were scored.
+    """
+    ks = tuple(ks)
+    keys = {question_id: fingerprint(retrieved[question_id], correct, ks,
+                                     overlap_threshold)
+            for question_id, correct in truth.items()
+            if question_id in retrieved}
+    cached = cache.get_many(list(set(keys.values())))
+
+    names = metric_names(ks)
+    per_question, scored = {}, {}
+    for question_id, key in keys.items():
+        if key in cached:
+            metrics = dict(zip(names, array('d', cached[key])))
+        elif key in scored:
+            metrics = scored[key]
+        else:
+            metrics = evaluate_ranking(retrieved[question_id],
+                                       SourceIntervals(truth[question_id]),
+                                       ks, overlap_threshold)
+            scored[key] = metrics
+        per_question[question_id] = metrics
+    if scored:
+        cache.put_many({key: array('d', [metrics[name] for name in names])
+                        .tobytes() for key, metrics in scored.items()})
+    return per_question, len(scored)
+
+
+def diff_runs(before: Dict[str, Dict[str, float]],
+              after: Dict[str, Dict[str, float]],
+              metric: str = 'recall@k') -> Dict[str, Any]:
+    """Questions whose metric rose or fell between two runs
+
+    improved and regressed hold (question id, before, after) tuples, largest
+    change first; only questions scored in both runs are compared.
+    """
+    improved, regressed, unchanged = [], [], 0
+    for question_id in before.keys() & after.keys():
+        old, new = before[question_id][metric], after[question_id][metric]
+        if new > old:
+            improved.append((question_id, old, new))
+        elif new < old:
+            regressed.append((question_id, old, new))
+        else:
+            unchanged += 1
+    improved.sort(key=lambda row: (row[1] - row[2], row[0]))
+    regressed.sort(key=lambda row: (row[2] - row[1], row[0]))
+    return {
+        'improved': improved,
+        'regressed': regressed,
+        'unchanged': unchanged,
+        'only_before': sorted(before.keys() - after.keys()),
+        'only_after': sorted(after.keys() - before.keys()),
+    }
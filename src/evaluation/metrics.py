@@ -1,8 +1,14 @@
-from typing import List, Dict, Any
-from ..models.data_models import MinimalSource
+import json
+import math
+from bisect import bisect_left
+from itertools import accumulate
+from typing import List, Dict, Any, Iterable, TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from ..models.data_models import MinimalSource
 
-def calculate_overlap(source1: MinimalSource, source2: MinimalSource) -> float:
+
+def calculate_overlap(source1: "MinimalSource", source2: "MinimalSource") -> float:
     """Calculate overlap percentage between two sources"""
     if source1.file_path != source2.file_path:
         return 0.0
@@ -24,8 +30,8 @@ def calculate_overlap(source1: MinimalSource, source2: MinimalSource) -> float:
 
 
 def calculate_recall_at_k(
-    retrieved_sources: List[MinimalSource],
-    correct_sources: List[MinimalSource],
+    retrieved_sources: List["MinimalSource"],
+    correct_sources: List["MinimalSource"],
     overlap_threshold: float = 0.05
 ) -> float:
     """Calculate recall@k for a single question"""
@@ -42,36 +48,158 @@ def calculate_recall_at_k(
     return found_sources / len(correct_sources)
 
 
-def evaluate_dataset_recall(search_results_file: str,
-                            ground_truth_file: str) -> float:
-    """Evaluate recall@k on entire dataset"""
-    import json
-
+class SourceIntervals:
+    """Correct sources of one question as sorted interval arrays per file
+
+    Starts are sorted with a running maximum of ends, so the sources a
+    retrieved span overlaps are found by bisecting on its end and walking
+    back only while earlier sources can still reach its start.
+    """
+
+    def __init__(self, sources: List[Dict[str, Any]]):
+        self.count = len(sources)
+        by_file = {}
+        for source_id, source in enumerate(sources):
+            by_file.setdefault(source['file_path'], []).append(
+                (source['first_character_index'],
+                 source['last_character_index'], source_id))
+
+        self.files = {}
+        for file_path, spans in by_file.items():
+            spans.sort()
+            ends = [end for _, end, _ in spans]
+            self.files[file_path] = ([start for start, _, _ in spans], ends,
+                                     [source_id for _, _, source_id in spans],
+                                     list(accumulate(ends, max)))
+
+    def matches(self, source: Dict[str, Any],
+                overlap_threshold: float = 0.05) -> List[int]:
+        """Ids of correct sources that a retrieved source counts as finding
+
+        Uses the same criterion as calculate_overlap(retrieved, correct).
+        """
+        arrays = self.files.get(source['file_path'])
+        start = source['first_character_index']
+        end = source['last_character_index']
+        length = end - start
+        if arrays is None or length <= 0:
+            return []
+
+        starts, ends, ids, reach = arrays
+        found = []
+        i = bisect_left(starts, end) - 1
+        while i >= 0 and reach[i] > start:
+            overlap = min(end, ends[i]) - max(start, starts[i])
+            if overlap > 0 and overlap / length >= overlap_threshold:
+                found.append(ids[i])
+            i -= 1
+        return found
+
+
+def evaluate_ranking(retrieved_sources: List[Dict[str, Any]],
+                     truth: SourceIntervals, ks: Iterable[int] = (1, 5, 10),
+                     overlap_threshold: float = 0.05) -> Dict[str, float]:
+    """Recall@{ks}, recall over all retrieved (recall@k), MRR and nDCG
+
+    Computed in a single pass over the ranking. A retrieved source gains
+    relevance 1 for nDCG when it finds a correct source not found earlier.
+    """
+    if not truth.count:
+        # No correct sources to find
+        return {**{f'recall@{k}': 1.0 for k in ks},
+                'recall@k': 1.0, 'mrr': 1.0, 'ndcg': 1.0}
+
+    found_at = {}
+    first_hit = None
+    dcg = 0.0
+    for rank, source in enumerate(retrieved_sources):
+        hits = truth.matches(source, overlap_threshold)
+        if hits and first_hit is None:
+            first_hit = rank
+        new = [source_id for source_id in hits if source_id not in found_at]
+        for source_id in new:
+            found_at[source_id] = rank
+        if new:
+            dcg += 1 / math.log2(rank + 2)
+
+    metrics = {f'recall@{k}': sum(1 for rank in found_at.values() if rank < k)
+               / truth.count for k in ks}
+    metrics['recall@k'] = len(found_at) / truth.count
+    metrics['mrr'] = 1 / (first_hit + 1) if first_hit is not None else 0.0
+    ideal = sum(1 / math.log2(rank + 2)
+                for rank in range(min(truth.count, len(retrieved_sources))))
+    metrics['ndcg'] = dcg / ideal if ideal else 0.0
+    return metrics
+
+
+def evaluate_questions(retrieved: Dict[str, List[Dict[str, Any]]],
+                       truth: Dict[str, List[Dict[str, Any]]],
+                       ks: Iterable[int] = (1, 5, 10),
+                       overlap_threshold: float = 0.05
+                       ) -> Dict[str, Dict[str, float]]:
+    """Metrics of every question that has both results and ground truth"""
+    ks = tuple(ks)
+    return {question_id: evaluate_ranking(retrieved[question_id],
+                                          SourceIntervals(correct), ks,
+                                          overlap_threshold)
+            for question_id, correct in truth.items()
+            if question_id in retrieved}
+
+
+def mean_metrics(per_question: Dict[str, Dict[str, float]],
+                 ks: Iterable[int] = (1, 5, 10)) -> Dict[str, float]:
+    """Mean of per-question metrics, plus the number of questions"""
+    if not per_question:
+        names = [f'recall@{k}' for k in ks] + ['recall@k', 'mrr', 'ndcg']
+        return {**dict.fromkeys(names, 0.0), 'questions': 0}
+    totals = {}
+    for metrics in per_question.values():
+        for name, value in metrics.items():
+            totals[name] = totals.get(name, 0.0) + value
+    report = {name: total / len(per_question) for name, total in totals.items()}
+    report['questions'] = len(per_question)
+    return report
+
+
+def evaluate_results(retrieved: Dict[str, List[Dict[str, Any]]],
+                     truth: Dict[str, List[Dict[str, Any]]],
+                     ks: Iterable[int] = (1, 5, 10),
+                     overlap_threshold: float = 0.05) -> Dict[str, float]:
+    """Mean metrics over questions that have both results and ground truth"""
+    ks = tuple(ks)
+    return mean_metrics(
+        evaluate_questions(retrieved, truth, ks, overlap_threshold), ks)
+
+
+def load_dataset_sources(search_results_file: str, ground_truth_file: str):
+    """Retrieved and correct sources by question id, from the two files"""
     with open(search_results_file, 'r') as f:
-        search_results = json.load(f)
+        if search_results_file.endswith(".jsonl"):
+            search_results = {'search_results': [json.loads(line)
+                                                 for line in f if line.strip()]}
+        else:
+            search_results = json.load(f)
 
     with open(ground_truth_file, 'r') as f:
         ground_truth = json.load(f)
 
-    # Create lookup for ground truth
-    truth_lookup = {}
-    for question in ground_truth['rag_questions']:
-        if 'sources' in question:
-            truth_lookup[question['question_id']] = [
-                MinimalSource(**source) for source in question['sources']
-            ]
+    truth = {question['question_id']: question['sources']
+             for question in ground_truth['rag_questions']
+             if 'sources' in question}
+    retrieved = {result['question_id']: result['retrieved_sources']
+                 for result in search_results['search_results']}
+    return retrieved, truth
 
-    total_recall = 0
-    valid_questions = 0
 
-    for result in search_results['search_results']:
-        question_id = result['question_id']
-        if question_id in truth_lookup:
-            retrieved = [MinimalSource(**source) for source in result['retrieved_sources']]
-            correct = truth_lookup[question_id]
+def evaluate_dataset(search_results_file: str, ground_truth_file: str,
+                     ks: Iterable[int] = (1, 5, 10)) -> Dict[str, float]:
+    """Evaluate recall@{1,5,10,k}, MRR and nDCG on entire dataset"""
+    retrieved, truth = load_dataset_sources(search_results_file,
+                                            ground_truth_file)
+    return evaluate_results(retrieved, truth, ks)
 
-            recall = calculate_recall_at_k(retrieved, correct)
-            total_recall += recall
-            valid_questions += 1
 
-    return total_recall / valid_questions if valid_questions > 0 else 0.0
+def evaluate_dataset_recall(search_results_file: str,
+                            ground_truth_file: str) -> float:
+    """Evaluate recall@k on entire dataset"""
+    return evaluate_dataset(search_results_file, ground_truth_file)['recall@k']
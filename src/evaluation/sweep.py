@@ -0,0 +1,144 @@
+"""
+Parameter Sweep Module
+
+This module evaluates a grid of BM25 parameters (k1, b) against ground truth
+without re-indexing for every point. A repository chunked at one chunk size
+is tokenized once into a SweepCorpus of postings (term -> documents and term
+frequencies). A grid point only recomputes the BM25 weight of every posting
+and scores a query by summing the weights of its terms' postings. Ranking
+matches BM25Retriever.search, including ties and documents scoring zero, so
+the recall of a point is the recall a real index with those parameters
+would get. Grid points run in parallel worker processes, each receiving the
+corpus once.
+"""
+
+import heapq
+import math
+import multiprocessing
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, List, Tuple
+
+from ..retrieval.bm25 import BM25Retriever
+from .metrics import evaluate_results
+
+
+class SweepCorpus:
+    def __init__(self, chunks: List[Dict[str, Any]],
+                 tokenized_docs: List[List[str]]):
+        self.sources = [(c['file_path'], c['start_char'], c['end_char'])
+                        for c in chunks]
+        self.doc_len = [len(tokens) for tokens in tokenized_docs]
+        self.avgdl = sum(self.doc_len) / len(self.doc_len)
+        # term -> (document ids, term frequencies), both in document order
+        self.postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for doc_idx, tokens in enumerate(tokenized_docs):
+            for token, tf in Counter(tokens).items():
+                docs, tfs = self.postings.setdefault(token, ([], []))
+                docs.append(doc_idx)
+                tfs.append(tf)
+
+        num_docs = len(tokenized_docs)
+        self.idf = {token: math.log((num_docs - len(docs) + 0.5)
+                                    / (len(docs) + 0.5))
+                    for token, (docs, _) in self.postings.items()}
+
+    def weights(self, k1: float, b: float) -> Dict[str, List[float]]:
+        """BM25 weight of every posting for one (k1, b)"""
+        avgdl, doc_len = self.avgdl, self.doc_len
+        weights = {}
+        for token, (docs, tfs) in self.postings.items():
+            idf = self.idf[token]
+            # Same expression as BM25Retriever._term_score, so scores are equal
+            weights[token] = [
+                idf * (tf * (k1 + 1)) / (
+                    tf + k1 * (1 - b + b * doc_len[doc] / avgdl))
+                for doc, tf in zip(docs, tfs)]
+        return weights
+
+    def search(self, query_tokens: List[str],
+               weights: Dict[str, List[float]], k: int) -> List[int]:
+        """Top-k document ids, ordered as BM25Retriever.search orders them"""
+        scores = defaultdict(float)
+        for token in query_tokens:
+            if token in weights:
+                for doc, weight in zip(self.postings[token][0], weights[token]):
+                    scores[doc] += weight
+
+        # The full scan ranks every document, unmatched ones scoring 0, and
+        # its stable sort breaks ties by document order
+        order = lambda doc: (-scores[doc], doc)
+        ranked = heapq.nsmallest(
+            k, (doc for doc, score in scores.items() if score > 0), key=order)
+        if len(ranked) < k:
+            ranked.extend(islice((doc for doc in range(len(self.doc_len))
+                                  if scores.get(doc, 0) == 0),
+                                 k - len(ranked)))
+        if len(ranked) < k:
+            ranked.extend(heapq.nsmallest(
+                k - len(ranked),
+                (doc for doc, score in scores.items() if score < 0), key=order))
+        return ranked
+
+    def format_sources(self, doc_ids: List[int]) -> List[Dict[str, Any]]:
+        return [{'file_path': file_path, 'first_character_index': start,
+                 'last_character_index': end}
+                for file_path, start, end in (self.sources[d] for d in doc_ids)]
+
+
+# Per-process state of sweep workers, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(corpus: SweepCorpus, queries: List[Tuple[str, List[str]]],
+                 truth: Dict[str, List[Dict[str, Any]]], k: int):
+    _worker.update(corpus=corpus, queries=queries, truth=truth, k=k)
+
+
+def _evaluate_point(point: Tuple[float, float]) -> Dict[str, Any]:
+    corpus, k = _worker['corpus'], _worker['k']
+    k1, b = point
+    weights = corpus.weights(k1, b)
+    retrieved = {question_id: corpus.format_sources(
+                     corpus.search(tokens, weights, k))
+                 for question_id, tokens in _worker['queries']}
+    return {'k1': k1, 'b': b, **evaluate_results(retrieved, _worker['truth'])}
+
+
+def sweep_grid(corpus: SweepCorpus, queries: List[Tuple[str, List[str]]],
+               truth: Dict[str, List[Dict[str, Any]]],
+               grid: List[Tuple[float, float]], k: int = 10,
+               workers: int = None) -> List[Dict[str, Any]]:
+    """Metrics for every (k1, b) point, in grid order"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(corpus, queries, truth, k)) as pool:
+        return list(pool.map(_evaluate_point, grid))
+
+
+def search_latencies(corpus: SweepCorpus, chunks: List[Dict[str, Any]],
+                     tokenized_docs: List[List[str]], questions: List[str],
+                     k: int = 10) -> List[float]:
+    """Sorted per-query seconds of BM25Retriever.search over these chunks
+
+    Latency depends on the chunking, not on k1 and b, so it is measured once
+    per chunk size on a retriever assembled from the shared tokenization.
+    """
+    retriever = BM25Retriever()
+    retriever.documents = chunks
+    retriever.tokenized_docs = tokenized_docs
+    retriever.doc_len = corpus.doc_len
+    retriever.avgdl = corpus.avgdl
+    retriever.idf = corpus.idf
+    retriever.doc_freqs.update((token, len(docs)) for token, (docs, _)
+                               in corpus.postings.items())
+
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        retriever.search(question, k)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
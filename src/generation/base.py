@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Iterator, Optional
+
+from .context import pack_context
+from .compression import compress_context
+from .cache import ResponseCache
+from ..profiling.tracing import span
+
+
+class GenerationBackend(ABC):
+    def __init__(self, model: str, context_tokens: int = 1024,
+                 cache: Optional[ResponseCache] = None):
+        self.model = model
+        self.context_tokens = context_tokens
+        self.cache = cache
+        self.options = {}
+        # Per-chunk character budget for query-focused compression; 0 is off
+        self.compress_chars = 0
+        self.last_stats = {}
+        # Seconds of model loading paid by answer requests so far
+        self.load_time = 0.0
+
+    @abstractmethod
+    def generate_answer(self, question: str, context_chunks:
+                        List[Dict[str, Any]]) -> str:
+        """Return the answer to question given retrieved context"""
+        pass
+
+    def stream_answer(self, question: str, context_chunks:
+                      List[Dict[str, Any]],
+                      stats: Dict[str, Any] = None) -> Iterator[str]:
+        """Yield answer tokens; backends without streaming yield one piece"""
+        yield self.generate_answer(question, context_chunks)
+        if stats is not None:
+            stats.update(self.last_stats)
+
+    async def agenerate_answer(self, question: str, context_chunks:
+                               List[Dict[str, Any]]) -> str:
+        """Generate answer without blocking the event loop"""
+        import asyncio
+
+        return await asyncio.to_thread(
+            self.generate_answer, question, context_chunks)
+
+    async def aclose(self):
+        """Release resources bound to the current event loop"""
+        pass
+
+    def warm_up(self, keep_alive=-1) -> float:
+        """Load the model ahead of the first question; returns seconds"""
+        return 0.0
+
+    def release(self):
+        """Undo warm_up once a run is over"""
+        pass
+
+    def _build_prompt(self, question: str, context_chunks:
+                      List[Dict[str, Any]]) -> str:
+        """Build the answer prompt from retrieved context"""
+
+        # Build context from merged, deduplicated chunks within the budget
+        with span("context_build"):
+            context_parts = []
+            packed = pack_context(context_chunks, self.context_tokens)
+            if self.compress_chars:
+                packed = compress_context(packed, question, self.compress_chars)
+            for i, chunk in enumerate(packed):
+                context_parts.append(f"Source {i+1} ({chunk['file_path']}):\n{chunk['content']}\n")
+
+            context = "\n---\n".join(context_parts)
+
+        # Create prompt
+        return f"""Based on the following context from a code repository, answer the question below.
+
+Context:
+{context}
+
+Question: {question}
+
+Please provide a comprehensive answer based only on the information in the context above. If the context doesn't contain enough information to answer the question, please say so.
+
+Answer:"""
+
+    def _cache_lookup(self, prompt: str) -> Optional[str]:
+        """Cached answer for this prompt, if any"""
+        if self.cache is None:
+            return None
+        answer = self.cache.get(
+            self.cache.make_key(self.model, prompt, self.options))
+        if answer is not None:
+            self.last_stats = {'time_to_first_token': 0.0, 'total_time': 0.0,
+                               'load_time': 0.0, 'prompt_tokens': None,
+                               'tokens': 0, 'tokens_per_sec': 0.0,
+                               'cached': True}
+        return answer
+
+    def _cache_store(self, prompt: str, answer: str) -> str:
+        if self.cache is not None:
+            self.cache.put(
+                self.cache.make_key(self.model, prompt, self.options), answer)
+        return answer
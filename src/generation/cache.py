@@ -0,0 +1,105 @@
+"""
+Response Cache Module
+
+This module provides an on-disk cache of LLM responses backed by SQLite.
+Entries are keyed on a hash of the model name, the full prompt and the
+generation options, so any change to retrieval or prompting produces a new
+key while unchanged questions are answered for free on re-runs. The cache is
+bounded in size and evicts least-recently-used entries first. The database
+is opened on the first lookup, not when the cache is created.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    def __init__(self, path: str = "data/cache/llm_responses.sqlite",
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use, so commands that never generate
+        an answer leave no cache file behind"""
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_lru"
+                " ON responses (last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(model: str, prompt: str,
+                 options: Optional[Dict[str, Any]] = None) -> str:
+        """Stable hash of everything that determines the response"""
+        payload = json.dumps({'model': model, 'prompt': prompt,
+                              'options': options or {}}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str):
+        size = len(response.encode())
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under max_bytes"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        return (f"LLM cache: {self.hits} hits / {self.hits + self.misses} "
+                f"lookups ({self.hit_rate * 100:.1f}% hit rate)")
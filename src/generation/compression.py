@@ -0,0 +1,121 @@
+"""
+Context Compression Module
+
+This module shrinks retrieved chunks to the parts relevant to the question
+before they are put in the prompt. Each chunk is split into lines, windows
+of consecutive lines are ranked by query-term density, and the densest
+windows are kept until the chunk's character budget is used. For code, the
+`def`/`class` signatures enclosing every kept line are kept as well; for
+Markdown, the headers above them. Dropped stretches are replaced by an
+ellipsis line. Character spans are left untouched, so sources are still
+reported with the original chunk boundaries.
+"""
+
+import re
+from typing import List, Dict, Any, Set
+
+# Question words that carry no signal about where the answer is
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'be', 'by', 'can', 'do', 'does', 'for',
+    'from', 'how', 'i', 'if', 'in', 'is', 'it', 'of', 'on', 'or', 'that',
+    'the', 'this', 'to', 'used', 'what', 'when', 'where', 'which', 'who',
+    'why', 'with', 'you',
+}
+
+SIGNATURE = re.compile(r'\s*(async\s+def|def|class)\b')
+HEADER = re.compile(r'(#{1,6})\s')
+
+
+def query_terms(question: str) -> Set[str]:
+    """Lowercased question words, minus stopwords"""
+    return {t for t in re.findall(r'\b\w+\b', question.lower())
+            if t not in STOPWORDS}
+
+
+def compress_chunk(chunk: Dict[str, Any], terms: Set[str],
+                   max_chars: int = 600, window: int = 3
+                   ) -> Dict[str, Any]:
+    """Keep the densest windows of a chunk plus its enclosing structure"""
+    content = chunk['content']
+    if len(content) <= max_chars or not terms:
+        return chunk
+
+    lines = content.split('\n')
+    hits = [sum(1 for t in re.findall(r'\b\w+\b', line.lower()) if t in terms)
+            for line in lines]
+    if not any(hits):
+        return chunk
+
+    # Rank windows by hits per character, densest first
+    windows = []
+    for start in range(0, len(lines), max(window - 1, 1)):
+        end = min(start + window, len(lines))
+        found = sum(hits[start:end])
+        if found:
+            size = sum(len(line) + 1 for line in lines[start:end])
+            windows.append((found / size, start, end))
+    windows.sort(key=lambda w: -w[0])
+
+    is_markdown = chunk['file_path'].endswith('.md')
+    kept = set()
+    used = 0
+    for _, start, end in windows:
+        new = set(range(start, end)) - kept
+        new |= _enclosing(lines, new, is_markdown) - kept
+        cost = sum(len(lines[i]) + 1 for i in new)
+        if used and used + cost > max_chars:
+            continue
+        kept |= new
+        used += cost
+
+    parts = []
+    previous = -1
+    for i in sorted(kept):
+        if i > previous + 1:
+            parts.append(_ellipsis(lines[i]))
+        parts.append(lines[i])
+        previous = i
+    if previous < len(lines) - 1:
+        parts.append(_ellipsis(lines[previous]))
+
+    return dict(chunk, content='\n'.join(parts))
+
+
+def compress_context(chunks: List[Dict[str, Any]], question: str,
+                     max_chars: int = 600) -> List[Dict[str, Any]]:
+    """Compress every chunk for the given question"""
+    terms = query_terms(question)
+    return [compress_chunk(chunk, terms, max_chars) for chunk in chunks]
+
+
+def _enclosing(lines: List[str], kept: Set[int], is_markdown: bool) -> Set[int]:
+    """Signature or header lines that scope the kept lines"""
+    enclosing = set()
+    for i in kept:
+        if is_markdown:
+            level = 7
+            for j in range(i, -1, -1):
+                match = HEADER.match(lines[j])
+                if match and len(match.group(1)) < level:
+                    enclosing.add(j)
+                    level = len(match.group(1))
+                    if level == 1:
+                        break
+        else:
+            indent = _indent(lines[i]) + (1 if SIGNATURE.match(lines[i]) else 0)
+            for j in range(i, -1, -1):
+                if SIGNATURE.match(lines[j]) and _indent(lines[j]) < indent:
+                    enclosing.add(j)
+                    indent = _indent(lines[j])
+                    if indent == 0:
+                        break
+    return enclosing
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _ellipsis(line: str) -> str:
+    """Gap marker indented like the neighbouring line"""
+    return ' ' * _indent(line) + '...'
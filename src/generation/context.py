@@ -0,0 +1,132 @@
+"""
+Context Packing Module
+
+This module turns ranked retrieval results into the context sent to the LLM
+under a token budget. Chunks from the same file whose character spans overlap
+or touch are merged into one span (nested class/method chunks collapse into
+the enclosing one), exact duplicates are dropped, and the merged spans are
+then added greedily by score until the budget is spent. A span too large for
+what is left is replaced by its best-scored chunks that fit.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+
+# Rough characters-per-token ratio for code and English prose
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate that needs no tokenizer"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_context(chunks: List[Dict[str, Any]], token_budget: int,
+                 scores: Optional[List[float]] = None
+                 ) -> List[Dict[str, Any]]:
+    """Merge, deduplicate and greedily fill the budget by score
+
+    Chunks are assumed to be in rank order when no scores are given.
+    """
+    if scores is None:
+        scores = [-rank for rank in range(len(chunks))]
+
+    # Drop exact duplicates, keeping the best-scored copy
+    seen = set()
+    units = []
+    for chunk, score in sorted(zip(chunks, scores), key=lambda x: -x[1]):
+        key = chunk['content']
+        if key in seen:
+            continue
+        seen.add(key)
+        units.append(dict(chunk, score=score))
+
+    # Greedy fill by score. A merged span that does not fit falls back to
+    # its best-scored pieces, so merging never costs a top-ranked chunk
+    packed = []
+    used = 0
+    for unit, pieces in sorted(_merge_spans(units),
+                               key=lambda m: -m[0]['score']):
+        cost = estimate_tokens(unit['content'])
+        if used + cost <= token_budget:
+            packed.append(unit)
+            used += cost
+            continue
+        chosen = []
+        for piece in sorted(pieces, key=lambda u: -u['score']):
+            cost = estimate_tokens(piece['content'])
+            if used + cost > token_budget or \
+                    any(_overlaps(piece, other) for other in chosen):
+                continue
+            chosen.append(piece)
+            used += cost
+        if not chosen and not packed:
+            # Even the best chunk exceeds the whole budget: keep its head
+            best = _trim(max(pieces, key=lambda u: u['score']),
+                         token_budget)
+            if best is None:
+                continue
+            chosen.append(best)
+            used += estimate_tokens(best['content'])
+        packed.extend(span for span, _ in _merge_spans(chosen))
+
+    return packed
+
+
+def _merge_spans(units: List[Dict[str, Any]]
+                 ) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Merge overlapping or adjacent spans per file
+
+    Returns each merged span with the chunks it was built from.
+    """
+    by_file = {}
+    for unit in units:
+        by_file.setdefault(unit['file_path'], []).append(unit)
+
+    merged = []
+    for file_units in by_file.values():
+        file_units.sort(key=lambda u: (u['start_char'], -u['end_char']))
+        current, pieces = file_units[0], [file_units[0]]
+        for unit in file_units[1:]:
+            # +1 tolerates the newline between consecutive line-based chunks
+            if unit['start_char'] <= current['end_char'] + 1:
+                current = _merge(current, unit)
+                pieces.append(unit)
+            else:
+                merged.append((current, pieces))
+                current, pieces = unit, [unit]
+        merged.append((current, pieces))
+    return merged
+
+
+def _merge(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge two same-file chunks where second starts inside or after first"""
+    content = first['content']
+    if second['end_char'] > first['end_char']:
+        # Character offsets say how much of second is already in first;
+        # spans that only touch lost the newline between them
+        overlap = max(first['end_char'] - second['start_char'], 0)
+        separator = "\n" if second['start_char'] >= first['end_char'] else ""
+        content = content + separator + second['content'][overlap:]
+
+    return dict(
+        first,
+        content=content,
+        end_char=max(first['end_char'], second['end_char']),
+        score=max(first['score'], second['score']),
+    )
+
+
+def _overlaps(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    return first['start_char'] < second['end_char'] and \
+        second['start_char'] < first['end_char']
+
+
+def _trim(unit: Dict[str, Any], token_budget: int
+          ) -> Optional[Dict[str, Any]]:
+    """Cut a chunk down to its head that fits in token_budget"""
+    size = (token_budget - 1) * CHARS_PER_TOKEN
+    if size <= 0:
+        return None
+    content = unit['content'][:size]
+    return dict(unit, content=content,
+                end_char=unit['start_char'] + len(content))
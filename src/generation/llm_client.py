@@ -1,42 +1,200 @@
-from ollama import chat
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterator, Optional, Union, TYPE_CHECKING
 
+from .base import GenerationBackend
+from .cache import ResponseCache
+from ..profiling.tracing import span
 
-class OllamaClient:
-    def __init__(self, model: str = "qwen3:0.6b"):
-        self.model = model
+if TYPE_CHECKING:
+    from ollama import Client
 
-    def generate_answer(self, question: str, context_chunks:
-                        List[Dict[str, Any]]) -> str:
-        """Generate answer using retrieved context"""
 
-        # Build context from chunks
-        context_parts = []
-        for i, chunk in enumerate(context_chunks[:5]):  # Limit context size
-            context_parts.append(f"Source {i+1} ({chunk['file_path']}):\n{chunk['content']}\n")
+class OllamaClient(GenerationBackend):
+    def __init__(self, model: str = "qwen3:0.6b", max_retries: int = 2,
+                 context_tokens: int = 1024,
+                 cache: Optional[ResponseCache] = None,
+                 host: Optional[str] = None,
+                 keep_alive: Union[float, str, None] = None):
+        super().__init__(model, context_tokens, cache)
+        self.max_retries = max_retries
+        # None leaves the model's residency to the server default
+        self.keep_alive = keep_alive
+        self.host = host
+        self._client = None
+        self._async_client = None
 
-        context = "\n---\n".join(context_parts)
+    @property
+    def client(self) -> "Client":
+        """Shared client, so requests reuse one pooled HTTP session"""
+        if self._client is None:
+            # Imported on first use; ollama and httpx dominate CLI startup
+            from ollama import Client
 
-        # Create prompt
-        prompt = f"""Based on the following context from a code repository, answer the question below.
+            self._client = Client(host=self.host)
+        return self._client
 
-Context:
-{context}
+    def warm_up(self, keep_alive: Union[float, str] = -1) -> float:
+        """Load the model ahead of the first question and pin it in memory
 
-Question: {question}
+        An empty prompt only loads the model. keep_alive -1 keeps it
+        resident until release(). Returns the load time in seconds, as
+        reported by the server when available.
+        """
+        self.keep_alive = keep_alive
+        start = time.perf_counter()
+        response = self.client.generate(model=self.model, prompt="",
+                                        keep_alive=keep_alive)
+        load = response.get('load_duration')
+        return load / 1e9 if load else time.perf_counter() - start
+
+    def release(self, keep_alive: Union[float, str] = "5m"):
+        """Unpin the model, letting the server expire it as usual"""
+        self.keep_alive = None
+        try:
+            self.client.generate(model=self.model, prompt="",
+                                 keep_alive=keep_alive)
+        except Exception:
+            pass
 
-Please provide a comprehensive answer based only on the information in the context above. If the context doesn't contain enough information to answer the question, please say so.
+    def close(self):
+        """Close the pooled HTTP session"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
 
-Answer:"""
+    def generate_answer(self, question: str, context_chunks:
+                        List[Dict[str, Any]]) -> str:
+        """Generate answer using retrieved context"""
+        prompt = self._build_prompt(question, context_chunks)
+        cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
 
         try:
-            response = chat(
-                model=self.model,
-                messages=[{
-                    'role': 'user',
-                    'content': prompt
-                }]
-            )
-            return response['message']['content']
+            start = time.perf_counter()
+            with span("llm_call"):
+                response = self.client.chat(
+                    model=self.model,
+                    messages=[{
+                        'role': 'user',
+                        'content': prompt
+                    }],
+                    options=self.options or None,
+                    keep_alive=self.keep_alive
+                )
+            self._record_stats(start, None, response)
+            return self._cache_store(prompt, response['message']['content'])
         except Exception as e:
             return f"Error generating answer: {str(e)}"
+
+    def stream_answer(self, question: str, context_chunks:
+                      List[Dict[str, Any]],
+                      stats: Dict[str, Any] = None) -> Iterator[str]:
+        """Yield answer tokens as the model produces them
+
+        Timing figures are stored in last_stats and copied into the optional
+        stats dict when the stream ends, which concurrent callers should use.
+        """
+        prompt = self._build_prompt(question, context_chunks)
+        cached = self._cache_lookup(prompt)
+        if cached is not None:
+            if stats is not None:
+                stats.update(self.last_stats)
+            yield cached
+            return
+
+        try:
+            start = time.perf_counter()
+            first_token = None
+            pieces = []
+            last = None
+            with span("llm_call"):
+                for part in self.client.chat(
+                    model=self.model,
+                    messages=[{
+                        'role': 'user',
+                        'content': prompt
+                    }],
+                    options=self.options or None,
+                    keep_alive=self.keep_alive,
+                    stream=True
+                ):
+                    token = part['message']['content']
+                    if token:
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                        pieces.append(token)
+                        yield token
+                    last = part
+            request_stats = self._record_stats(start, first_token, last,
+                                               len(pieces))
+            self._cache_store(prompt, "".join(pieces))
+            if stats is not None:
+                stats.update(request_stats)
+        except Exception as e:
+            yield f"Error generating answer: {str(e)}"
+
+    def _record_stats(self, start: float, first_token: float = None,
+                      final=None, pieces: int = 0) -> Dict[str, Any]:
+        """Store latency and throughput figures of the last request"""
+        total = time.perf_counter() - start
+        tokens = (final.get('eval_count') if final else None) or pieces
+        prompt_tokens = final.get('prompt_eval_count') if final else None
+        load = final.get('load_duration') if final else None
+        self.load_time += load / 1e9 if load else 0.0
+        if final and final.get('eval_duration'):
+            generating = final['eval_duration'] / 1e9
+        else:
+            generating = total - ((first_token - start) if first_token else 0)
+        self.last_stats = {
+            'time_to_first_token': (first_token - start) if first_token
+            else None,
+            'total_time': total,
+            # Time the server spent loading the model for this request
+            'load_time': load / 1e9 if load else 0.0,
+            'prompt_tokens': prompt_tokens,
+            'tokens': tokens,
+            'tokens_per_sec': tokens / generating if generating > 0 else 0.0,
+        }
+        return self.last_stats
+
+    async def agenerate_answer(self, question: str, context_chunks:
+                               List[Dict[str, Any]]) -> str:
+        """Generate answer asynchronously, retrying transient failures"""
+        import asyncio
+
+        prompt = self._build_prompt(question, context_chunks)
+        cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
+        if self._async_client is None:
+            # Bound to the running event loop, so created lazily
+            from ollama import AsyncClient
+
+            self._async_client = AsyncClient(host=self.host)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with span("llm_call"):
+                    response = await self._async_client.chat(
+                        model=self.model,
+                        messages=[{
+                            'role': 'user',
+                            'content': prompt
+                        }],
+                        options=self.options or None,
+                        keep_alive=self.keep_alive
+                    )
+                self.load_time += (response.get('load_duration') or 0) / 1e9
+                return self._cache_store(prompt,
+                                         response['message']['content'])
+            except Exception as e:
+                if attempt == self.max_retries:
+                    return f"Error generating answer: {str(e)}"
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def aclose(self):
+        """Close the async HTTP client of the current event loop"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
@@ -0,0 +1,236 @@
+"""
+Mock LLM Server Module
+
+This module runs a small local HTTP server that speaks enough of the Ollama
+API (`/api/chat`, `/api/generate`, `/api/tags`) to exercise the generation
+clients without a real model. Every request sleeps for a configurable latency
+and returns a canned answer, so client-side throughput and concurrency can be
+measured deterministically. Streaming requests emit the answer word by word,
+one word every `token_latency` seconds, after the initial latency. The first
+request also pays `load_latency` to simulate loading the model, reported as
+`load_duration`; a request with `keep_alive` 0 unloads it again.
+
+For tests, non-streaming chat requests are counted in `server.stats`
+(requests, failures, requests in flight and the most seen at once), the
+first `failures` of them get HTTP 500, and with `echo` the answer is the
+question taken from the prompt, so answers can be matched to questions.
+
+It also fakes an OpenAI-compatible `/v1/completions` endpoint backed by a
+single inference slot: requests run one at a time and cost `latency` plus
+`batch_item_latency` per prompt, so batching several prompts into one
+request is much cheaper than sending them separately, as with real local
+inference servers.
+
+    python -m src.generation.mock_server --port 11435 --latency 0.5
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fire
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.5
+    token_latency = 0.01
+    load_latency = 0.0
+    batch_item_latency = 0.01
+    failures = 0
+    echo = False
+    answer = "This is a mock answer generated from the retrieved context."
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "mock"}]})
+        elif self.path == "/v1/models":
+            self._send_json({"object": "list",
+                             "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path == "/api/generate" and not request.get("prompt"):
+            # Empty prompt: only load (or unload) the model
+            self._send_json(self._done_message(
+                request, {"response": ""}, self._load_model(request)))
+        elif self.path == "/api/chat" and request.get("stream"):
+            load = self._load_model(request)
+            time.sleep(self.latency)
+            self._stream_chat(request, load)
+        elif self.path == "/api/chat":
+            load = self._load_model(request)
+            fail = self._begin_chat()
+            try:
+                time.sleep(self.latency)
+                if fail:
+                    self._send_json({"error": "injected failure"}, status=500)
+                    return
+                answer = self._question(request) if self.echo else self.answer
+                self._send_json(self._done_message(
+                    request, self._chat_message(request, answer, True), load))
+            finally:
+                self._end_chat()
+        elif self.path == "/v1/completions":
+            self._completions(request)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _completions(self, request):
+        """Answer every prompt of the request in one pass of the slot"""
+        prompts = request.get("prompt", "")
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        with self.server.engine_lock:
+            time.sleep(self.latency + self.batch_item_latency * len(prompts))
+        tokens = len(self.answer.split())
+        self._send_json({
+            "object": "text_completion",
+            "model": request.get("model", "mock"),
+            "choices": [{"index": i, "text": self.answer,
+                         "finish_reason": "stop"}
+                        for i in range(len(prompts))],
+            "usage": {
+                "prompt_tokens": sum(len(p.split()) for p in prompts),
+                "completion_tokens": tokens * len(prompts),
+                "total_tokens": sum(len(p.split()) for p in prompts)
+                + tokens * len(prompts),
+            },
+        })
+
+    def _begin_chat(self) -> bool:
+        """Count a chat request in flight; True if it is to fail"""
+        stats = self.server.stats
+        with self.server.stats_lock:
+            stats['chat_requests'] += 1
+            stats['in_flight'] += 1
+            stats['max_in_flight'] = max(stats['max_in_flight'],
+                                         stats['in_flight'])
+            fail = stats['chat_requests'] <= self.failures
+            stats['failed'] += fail
+        return fail
+
+    def _end_chat(self):
+        with self.server.stats_lock:
+            self.server.stats['in_flight'] -= 1
+
+    @staticmethod
+    def _question(request) -> str:
+        """The question of the answer prompt, echoed back as the answer"""
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        for line in prompt.splitlines():
+            if line.startswith("Question: "):
+                return line[len("Question: "):]
+        return prompt
+
+    def _load_model(self, request) -> int:
+        """Simulate a cold model load; returns its duration in nanoseconds"""
+        server = self.server
+        with server.model_lock:
+            load = 0
+            if not server.model_loaded:
+                time.sleep(self.load_latency)
+                load = int(self.load_latency * 1e9)
+            server.model_loaded = request.get("keep_alive") not in (0, "0")
+        return load
+
+    def _done_message(self, request, message, load: int):
+        message.setdefault("model", request.get("model", "mock"))
+        message["done"] = True
+        message["load_duration"] = load
+        return message
+
+    def _chat_message(self, request, content: str, done: bool):
+        message = {
+            "model": request.get("model", "mock"),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+        if done:
+            message["done_reason"] = "stop"
+            message["eval_count"] = len(self.answer.split())
+        return message
+
+    def _stream_chat(self, request, load: int):
+        """Send one NDJSON message per word using chunked encoding"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        words = self.answer.split(" ")
+        try:
+            for i, word in enumerate(words):
+                token = word if i == 0 else " " + word
+                self._write_chunk(self._chat_message(request, token, False))
+                time.sleep(self.token_latency)
+            self._write_chunk(self._done_message(
+                request, self._chat_message(request, "", True), load))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. at its deadline
+            self.close_connection = True
+
+    def _write_chunk(self, payload):
+        data = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port: int = 0, latency: float = 0.5,
+                 token_latency: float = 0.01,
+                 load_latency: float = 0.0,
+                 batch_item_latency: float = 0.01,
+                 failures: int = 0, echo: bool = False) -> ThreadingHTTPServer:
+    """Start the mock server in a background thread; port 0 picks a free one"""
+    handler = type("Handler", (MockLLMHandler,), {
+        "latency": latency, "token_latency": token_latency,
+        "load_latency": load_latency,
+        "batch_item_latency": batch_item_latency,
+        "failures": failures, "echo": echo})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.model_lock = threading.Lock()
+    server.model_loaded = False
+    server.engine_lock = threading.Lock()
+    server.stats_lock = threading.Lock()
+    server.stats = {'chat_requests': 0, 'failed': 0, 'in_flight': 0,
+                    'max_in_flight': 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve(port: int = 11435, latency: float = 0.5,
+          token_latency: float = 0.01, load_latency: float = 0.0,
+          batch_item_latency: float = 0.01):
+    """Run the mock server in the foreground"""
+    server = start_server(port, latency, token_latency, load_latency,
+                          batch_item_latency)
+    print(f"Mock LLM server listening on http://127.0.0.1:{port} "
+          f"(latency {latency}s per request)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    fire.Fire(serve)
@@ -0,0 +1,149 @@
+"""
+OpenAI-Compatible Backend Module
+
+This module generates answers through a local inference server exposing the
+OpenAI `/v1/completions` endpoint (llama.cpp server, vLLM and similar).
+Such servers process a batch of prompts far more efficiently than the same
+prompts one by one, so concurrent `generate_answer` calls are micro-batched:
+the first request opens a short window, every request arriving within it
+(up to `max_batch_size`) joins, and the batch is sent as one completion
+request with a list of prompts. Callers block until their own choice comes
+back. Only one batch is in flight at a time; requests arriving meanwhile
+form the next batch.
+"""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit
+
+from .base import GenerationBackend
+from .cache import ResponseCache
+from ..profiling.tracing import span
+
+
+class OpenAIBackend(GenerationBackend):
+    def __init__(self, model: str = "qwen3:0.6b",
+                 base_url: str = "http://127.0.0.1:8080/v1",
+                 context_tokens: int = 1024,
+                 cache: Optional[ResponseCache] = None,
+                 batch_window_ms: float = 10, max_batch_size: int = 16,
+                 max_tokens: int = 512, timeout: float = 300):
+        super().__init__(model, context_tokens, cache)
+        self.base_url = base_url.rstrip("/")
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_size = max_batch_size
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.batches = 0
+        self._pending = queue.Queue()
+        self._connection = None
+        self._batcher = None
+        self._lock = threading.Lock()
+
+    def generate_answer(self, question: str, context_chunks:
+                        List[Dict[str, Any]]) -> str:
+        """Generate answer, sharing a batched request with concurrent callers"""
+        prompt = self._build_prompt(question, context_chunks)
+        cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
+
+        try:
+            start = time.perf_counter()
+            choice, usage = self._submit(prompt).result()
+            answer = choice['text']
+            tokens = usage.get('completion_tokens', 0)
+            total = time.perf_counter() - start
+            self.last_stats = {
+                'time_to_first_token': None,
+                'total_time': total,
+                'load_time': 0.0,
+                'prompt_tokens': usage.get('prompt_tokens'),
+                'tokens': tokens,
+                'tokens_per_sec': tokens / total if total > 0 else 0.0,
+            }
+            return self._cache_store(prompt, answer)
+        except Exception as e:
+            return f"Error generating answer: {str(e)}"
+
+    def _submit(self, prompt: str) -> Future:
+        """Queue a prompt for the next batch"""
+        with self._lock:
+            if self._batcher is None:
+                self._batcher = threading.Thread(target=self._run_batches,
+                                                 daemon=True)
+                self._batcher.start()
+        future = Future()
+        self._pending.put((prompt, future))
+        return future
+
+    def _run_batches(self):
+        """Collect prompts for one window, send them together, repeat"""
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.perf_counter() + self.batch_window_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._send_batch(batch)
+
+    def _send_batch(self, batch: List[tuple]):
+        try:
+            with span("llm_call"):
+                response = self._post("/completions", {
+                    'model': self.model,
+                    'prompt': [prompt for prompt, _ in batch],
+                    'max_tokens': self.max_tokens,
+                    **self.options,
+                })
+            self.batches += 1
+            # Usage is reported for the whole batch; split it evenly
+            usage = {key: value // len(batch) for key, value in
+                     response.get('usage', {}).items()
+                     if isinstance(value, int)}
+            choices = sorted(response['choices'], key=lambda c: c['index'])
+            for (_, future), choice in zip(batch, choices):
+                future.set_result((choice, usage))
+            if len(choices) < len(batch):
+                raise ValueError(f"Server returned {len(choices)} choices "
+                                 f"for {len(batch)} prompts")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST JSON over a kept-alive connection, reconnecting once"""
+        url = urlsplit(self.base_url)
+        body = json.dumps(payload).encode()
+        for attempt in range(2):
+            if self._connection is None:
+                connection_class = (HTTPSConnection if url.scheme == "https"
+                                    else HTTPConnection)
+                self._connection = connection_class(url.netloc,
+                                                    timeout=self.timeout)
+            try:
+                self._connection.request(
+                    "POST", url.path + path, body,
+                    {"Content-Type": "application/json"})
+                response = self._connection.getresponse()
+                data = response.read()
+            except (HTTPException, OSError):
+                self._connection.close()
+                self._connection = None
+                if attempt:
+                    raise
+                continue
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}: {data[:200]!r}")
+            return json.loads(data)
@@ -0,0 +1,148 @@
+"""
+Chunk Store Module
+
+This module keeps chunk metadata in columns instead of one dict per chunk.
+File paths and chunk types are interned into small tables and referenced by
+integer ids; ids, start and end offsets live in compact `array` columns, and
+contents in a plain list. The `name` and `qualified_name` of code
+definitions are optional columns (None where a chunk has no such key), and
+any other key a chunker emits is kept sparsely for the chunks that have it.
+`store[i]` returns a `Chunk`, a slotted view that reads like the old dict
+(`chunk['file_path']`, `chunk.get('name')`, `dict(chunk)`), so consumers of
+chunk dicts keep working unchanged, while hot paths such as formatting
+sources read the columns directly.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+COLUMNS = ('content', 'file_path', 'start_char', 'end_char', 'chunk_type')
+OPTIONAL_COLUMNS = ('name', 'qualified_name')
+
+
+class Chunk:
+    __slots__ = ('store', 'idx')
+
+    def __init__(self, store: "ChunkStore", idx: int):
+        self.store = store
+        self.idx = idx
+
+    @property
+    def content(self) -> str:
+        return self.store.contents[self.idx]
+
+    @property
+    def file_path(self) -> str:
+        return self.store.paths[self.store.file_ids[self.idx]]
+
+    @property
+    def start_char(self) -> int:
+        return self.store.starts[self.idx]
+
+    @property
+    def end_char(self) -> int:
+        return self.store.ends[self.idx]
+
+    @property
+    def chunk_type(self) -> str:
+        return self.store.types[self.store.type_ids[self.idx]]
+
+    def __getitem__(self, key: str) -> Any:
+        if key in COLUMNS:
+            return getattr(self, key)
+        if key in OPTIONAL_COLUMNS:
+            value = self.store.optional[key][self.idx]
+            if value is None:
+                raise KeyError(key)
+            return value
+        return self.store.extras.get(self.idx, {})[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys()
+
+    def keys(self) -> List[str]:
+        optional = [key for key in OPTIONAL_COLUMNS
+                    if self.store.optional[key][self.idx] is not None]
+        return [*COLUMNS, *optional, *self.store.extras.get(self.idx, ())]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"Chunk({self.file_path}:{self.start_char}-{self.end_char})"
+
+
+class ChunkStore:
+    def __init__(self):
+        # Interned file paths and chunk types, referenced by id
+        self.paths: List[str] = []
+        self.types: List[str] = []
+        self._path_ids: Dict[str, int] = {}
+        self._type_ids: Dict[str, int] = {}
+        self.file_ids = array('I')
+        # One byte per chunk; chunkers emit a handful of types
+        self.type_ids = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.contents: List[str] = []
+        self.optional: Dict[str, List[Optional[str]]] = {
+            key: [] for key in OPTIONAL_COLUMNS}
+        # Chunk index -> keys beyond the fixed and optional columns
+        self.extras: Dict[int, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Dict[str, Any]]) -> "ChunkStore":
+        store = cls()
+        for chunk in chunks:
+            store.append(chunk)
+        return store
+
+    def append(self, chunk: Dict[str, Any]):
+        """Add one chunk dict as a new row"""
+        file_path = chunk['file_path']
+        if file_path not in self._path_ids:
+            self._path_ids[file_path] = len(self.paths)
+            self.paths.append(file_path)
+        chunk_type = chunk.get('chunk_type', '')
+        if chunk_type not in self._type_ids:
+            self._type_ids[chunk_type] = len(self.types)
+            self.types.append(chunk_type)
+
+        for key, column in self.optional.items():
+            column.append(chunk.get(key))
+        extra = {key: value for key, value in chunk.items()
+                 if key not in COLUMNS and key not in OPTIONAL_COLUMNS}
+        if extra:
+            self.extras[len(self.contents)] = extra
+        self.file_ids.append(self._path_ids[file_path])
+        self.type_ids.append(self._type_ids[chunk_type])
+        self.starts.append(chunk['start_char'])
+        self.ends.append(chunk['end_char'])
+        self.contents.append(chunk['content'])
+
+    def span(self, idx: int) -> Tuple[str, int, int]:
+        """File path, start and end of a chunk, read from the columns"""
+        return (self.paths[self.file_ids[idx]], self.starts[idx],
+                self.ends[idx])
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def __getitem__(self, idx: int) -> Chunk:
+        if idx < 0:
+            idx += len(self.contents)
+        if not 0 <= idx < len(self.contents):
+            raise IndexError("chunk index out of range")
+        return Chunk(self, idx)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        return (Chunk(self, idx) for idx in range(len(self.contents)))
@@ -0,0 +1,140 @@
+"""
+Metadata Filter Module
+
+This module maintains per-extension, per-chunk-type and per-directory
+bitmaps over the chunk list so that searches can be restricted to a
+candidate set before any scoring happens. Bitmaps are plain Python integers
+(bit i set means chunk i matches), which gives fast AND/OR/NOT without extra
+dependencies. On disk they are stored as runs of consecutive chunk ids,
+since chunks of one file, and files of one directory, are indexed together.
+
+Filter expressions are whitespace- or comma-separated terms that are ANDed:
+
+    ext:.py                      only Python chunks
+    dir:vllm/engine              only chunks under vllm/engine/
+    type:documentation|text      OR within a field
+    -dir:tests                   negation
+"""
+
+import os
+import re
+from typing import List, Dict, Any
+
+
+class MetadataBitmaps:
+    FIELDS = ('ext', 'type', 'dir')
+
+    def __init__(self):
+        self.num_docs = 0
+        self.bitmaps: Dict[str, Dict[str, int]] = {f: {} for f in self.FIELDS}
+
+    def build(self, chunks: List[Dict[str, Any]], repo_path: str = "."):
+        """Build bitmaps for every extension, chunk type and directory"""
+        runs = {f: {} for f in self.FIELDS}
+
+        for idx, chunk in enumerate(chunks):
+            file_path = chunk['file_path']
+            rel_dir = os.path.dirname(os.path.relpath(file_path, repo_path))
+
+            keys = {
+                'ext': [os.path.splitext(file_path)[1].lower()],
+                'type': [chunk.get('chunk_type', '')],
+                'dir': self._ancestors(rel_dir),
+            }
+            for field, values in keys.items():
+                for value in values:
+                    field_runs = runs[field].setdefault(value, [])
+                    if field_runs and field_runs[-1][1] == idx:
+                        field_runs[-1][1] = idx + 1
+                    else:
+                        field_runs.append([idx, idx + 1])
+
+        self.num_docs = len(chunks)
+        self.bitmaps = {
+            field: {value: self._from_runs(r) for value, r in values.items()}
+            for field, values in runs.items()
+        }
+
+    def select(self, expression: str) -> int:
+        """Evaluate a filter expression into a bitmap of matching chunks"""
+        result = (1 << self.num_docs) - 1
+
+        for term in re.split(r'[\s,]+', expression.strip()):
+            if not term:
+                continue
+            negate = term.startswith(('-', '!'))
+            if negate:
+                term = term[1:]
+
+            field, sep, values = term.partition(':')
+            if not sep or field not in self.FIELDS:
+                raise ValueError(
+                    f"Invalid filter term '{term}'. "
+                    f"Expected one of {', '.join(self.FIELDS)} as 'field:value'"
+                )
+
+            bitmap = 0
+            for value in values.split('|'):
+                bitmap |= self.bitmaps[field].get(
+                    self._normalize(field, value), 0)
+
+            if negate:
+                result &= ~bitmap
+            else:
+                result &= bitmap
+
+        return result
+
+    def candidates(self, expression: str) -> List[int]:
+        """Sorted chunk ids matching a filter expression"""
+        bits = bin(self.select(expression))[:1:-1]
+        return [m.start() for m in re.finditer('1', bits)]
+
+    def to_dict(self) -> Dict:
+        return {
+            'num_docs': self.num_docs,
+            'bitmaps': {
+                field: {value: self._to_runs(b) for value, b in values.items()}
+                for field, values in self.bitmaps.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MetadataBitmaps":
+        index = cls()
+        index.num_docs = data['num_docs']
+        index.bitmaps = {
+            field: {value: cls._from_runs(r) for value, r in values.items()}
+            for field, values in data['bitmaps'].items()
+        }
+        return index
+
+    @staticmethod
+    def _ancestors(rel_dir: str) -> List[str]:
+        parts = [p for p in rel_dir.replace(os.sep, '/').split('/')
+                 if p and p != '.']
+        return ['/'.join(parts[:i]) for i in range(len(parts) + 1)]
+
+    @staticmethod
+    def _normalize(field: str, value: str) -> str:
+        if field == 'ext':
+            value = value.lower()
+            return value if not value or value.startswith('.') else '.' + value
+        if field == 'dir':
+            value = value.replace(os.sep, '/').strip('/')
+            if value.startswith('./'):
+                value = value[2:]
+            return '' if value == '.' else value
+        return value
+
+    @staticmethod
+    def _to_runs(bitmap: int) -> List[List[int]]:
+        bits = bin(bitmap)[:1:-1]
+        return [[m.start(), m.end()] for m in re.finditer('1+', bits)]
+
+    @staticmethod
+    def _from_runs(runs: List[List[int]]) -> int:
+        bitmap = 0
+        for start, end in runs:
+            bitmap |= ((1 << (end - start)) - 1) << start
+        return bitmap
@@ -6,6 +6,9 @@ from tqdm import tqdm
 from ..chunking.code_chunker import PythonCodeChunker
 from ..chunking.doc_chunker import MarkdownChunker
 from ..retrieval.bm25 import BM25Retriever
+from ..profiling.tracing import span
+from .filters import MetadataBitmaps
+from .symbols import SymbolIndex
 
 
 class RepositoryIndexer:
@@ -14,15 +17,41 @@ class RepositoryIndexer:
         self.code_chunker = PythonCodeChunker(max_chunk_size)
         self.doc_chunker = MarkdownChunker(max_chunk_size)
         self.retriever = BM25Retriever()
+        self.filters = MetadataBitmaps()
+        self.symbols = SymbolIndex()
         self.chunks = []
 
     def index_repository(self, repo_path: str,
-                        output_dir: str = "data/indexes"):
+                        output_dir: str = "data/indexes",
+                        tiered: bool = False):
         """Index entire repository"""
         print("Starting repository indexing...")
+        all_chunks = self.chunk_repository(repo_path)
 
+        # Index with BM25
+        print("Building BM25 index...")
+        self.retriever.index_documents(all_chunks)
+        self.chunks = all_chunks
+        with span("metadata_build"):
+            self.filters.build(all_chunks, repo_path)
+            self.symbols.build(all_chunks)
+        print(f"Found {len(self.symbols)} symbol definitions")
+
+        if tiered:
+            print("Building impact-ordered tiers...")
+            with span("tier_build"):
+                self.retriever.build_tiers()
+
+        # Save index to disk
+        with span("index_save"):
+            self._save_index(output_dir)
+        print(f"Index saved to {output_dir}")
+
+    def chunk_repository(self, repo_path: str) -> List[Dict[str, Any]]:
+        """Chunk every indexable file under repo_path"""
         # Find all relevant files
-        files_to_index = self._find_files(repo_path)
+        with span("file_discovery"):
+            files_to_index = self._find_files(repo_path)
 
         # Process files with progress bar
         all_chunks = []
@@ -31,15 +60,7 @@ class RepositoryIndexer:
             all_chunks.extend(chunks)
 
         print(f"Created {len(all_chunks)} chunks from {len(files_to_index)} files")
-
-        # Index with BM25
-        print("Building BM25 index...")
-        self.retriever.index_documents(all_chunks)
-        self.chunks = all_chunks
-
-        # Save index to disk
-        self._save_index(output_dir)
-        print(f"Index saved to {output_dir}")
+        return all_chunks
 
     def _find_files(self, repo_path: str) -> List[str]:
         """Find files to index"""
@@ -61,20 +82,22 @@ class RepositoryIndexer:
     def _process_file(self, file_path: str) -> List[Dict[str, Any]]:
         """Process single file into chunks"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with span("read"), \
+                    open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return []
 
         # Choose appropriate chunker
-        if file_path.endswith('.py'):
-            return self.code_chunker.chunk_content(content, file_path)
-        elif file_path.endswith(('.md', '.rst')):
-            return self.doc_chunker.chunk_content(content, file_path)
-        else:
-            # Generic text chunking
-            return self.code_chunker._simple_split(content, file_path)
+        with span("chunk"):
+            if file_path.endswith('.py'):
+                return self.code_chunker.chunk_content(content, file_path)
+            elif file_path.endswith(('.md', '.rst')):
+                return self.doc_chunker.chunk_content(content, file_path)
+            else:
+                # Generic text chunking
+                return self.code_chunker._simple_split(content, file_path)
 
     def _save_index(self, output_dir: str):
         """Save index components to disk"""
@@ -88,7 +111,8 @@ class RepositoryIndexer:
         # (simplified - you might want to pickle the full object)
         index_data = {
             'doc_freqs': dict(self.retriever.doc_freqs),
-            'idf': self.retriever.idf,
+            # Sorted so the query-time vocabulary can be built in linear time
+            'idf': dict(sorted(self.retriever.idf.items())),
             'doc_len': self.retriever.doc_len,
             'avgdl': self.retriever.avgdl,
             'k1': self.retriever.k1,
@@ -97,3 +121,17 @@ class RepositoryIndexer:
 
         with open(f"{output_dir}/bm25_index.json", 'w') as f:
             json.dump(index_data, f, indent=2)
+
+        with open(f"{output_dir}/filters.json", 'w') as f:
+            json.dump(self.filters.to_dict(), f)
+
+        with open(f"{output_dir}/symbols.json", 'w') as f:
+            json.dump(self.symbols.to_dict(), f)
+
+        tiered_file = f"{output_dir}/tiered_index.json"
+        if self.retriever.tiers is not None:
+            with open(tiered_file, 'w') as f:
+                json.dump(self.retriever.tiers.to_dict(), f)
+        elif os.path.exists(tiered_file):
+            # Stale tiers from a previous run would not match these chunks
+            os.remove(tiered_file)
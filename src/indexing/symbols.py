@@ -0,0 +1,89 @@
+"""
+Symbol Index Module
+
+This module keeps an exact symbol table built from the definitions emitted by
+PythonCodeChunker: every function, async function and class name, and its
+qualified name (e.g. `RAGSystem.search`), maps to the ids of the chunks that
+define it. Queries naming a defined symbol are answered with a dictionary
+lookup, which is both faster and more precise than BM25 for "where is X
+defined" questions.
+"""
+
+import re
+from typing import List, Dict, Any, Tuple
+
+from ..retrieval.reranker import extract_identifiers
+
+
+# Only explicit "where is X (defined)" / "definition of X" wording; a bare
+# identifier is an ordinary keyword query
+DEFINITION_QUERY = re.compile(
+    r"^\s*(?:where\s+(?:is|are)\s+|definition\s+of\s+)"
+    r"(?:the\s+)?(?:function\s+|method\s+|class\s+)?"
+    r"`?([A-Za-z_][\w.]*)`?(?:\(\))?"
+    r"(?:\s+(?:function|method|class))?"
+    r"(?:\s+(?:defined|declared|implemented))?\s*\??\s*$",
+    re.IGNORECASE,
+)
+
+# Names with more definitions than this (e.g. `run`, `search`) and bare
+# dunders are too ambiguous to pin; they are left to BM25 like any keyword
+MAX_DEFINITIONS = 3
+
+
+class SymbolIndex:
+    def __init__(self):
+        self.names: Dict[str, List[int]] = {}
+        self.qualified_names: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.qualified_names)
+
+    def build(self, chunks: List[Dict[str, Any]]):
+        """Collect definition names from code chunks"""
+        self.names = {}
+        self.qualified_names = {}
+        for idx, chunk in enumerate(chunks):
+            if 'name' not in chunk:
+                continue
+            self.names.setdefault(chunk['name'].lower(), []).append(idx)
+            self.qualified_names.setdefault(
+                chunk['qualified_name'].lower(), []).append(idx)
+
+    def lookup(self, query: str) -> Tuple[List[int], bool]:
+        """Chunks defining symbols named in the query
+
+        Returns the matching chunk ids and whether the query is a pure
+        definition lookup, whose remaining slots need no re-ranking. Names
+        with too many definitions to be a precise answer are skipped.
+        """
+        definition = DEFINITION_QUERY.match(query)
+        names = extract_identifiers(query)
+        if definition and definition.group(1) not in names:
+            names.append(definition.group(1))
+
+        hits = []
+        for name in names:
+            key = name.lower()
+            if key in self.qualified_names:
+                defined = self.qualified_names[key]
+            else:
+                bare = key.rsplit('.', 1)[-1]
+                if bare.startswith('__') and bare.endswith('__'):
+                    continue
+                defined = self.names.get(bare, [])
+            if len(defined) <= MAX_DEFINITIONS:
+                hits.extend(defined)
+
+        hits = list(dict.fromkeys(hits))
+        return hits, bool(hits) and definition is not None
+
+    def to_dict(self) -> Dict:
+        return {'names': self.names, 'qualified_names': self.qualified_names}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SymbolIndex":
+        index = cls()
+        index.names = data['names']
+        index.qualified_names = data['qualified_names']
+        return index
@@ -0,0 +1,52 @@
+"""
+Async Answering Pipeline Module
+
+This module answers a list of questions with a bounded number of LLM
+requests in flight. Retrieval runs on a single background thread and is
+pipelined ahead of generation through a bounded queue, so the CPU keeps
+retrieving upcoming questions while earlier ones are being generated.
+Results are collected in the original question order.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+async def answer_pipelined(
+    questions: List[Dict[str, Any]],
+    retrieve: Callable[[Dict[str, Any]], Any],
+    generate: Callable[[Dict[str, Any], Any], Awaitable[str]],
+    concurrency: int = 4,
+    on_result: Optional[Callable[[int, Any, str], None]] = None,
+) -> List[Tuple[Any, str]]:
+    """Retrieve and answer every question, returning (retrieved, answer)"""
+    loop = asyncio.get_running_loop()
+    # Retrieval may run at most this far ahead of generation
+    queue = asyncio.Queue(maxsize=2 * concurrency)
+    results = [None] * len(questions)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        async def produce():
+            for idx, question in enumerate(questions):
+                retrieved = await loop.run_in_executor(
+                    executor, retrieve, question)
+                await queue.put((idx, question, retrieved))
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                idx, question, retrieved = item
+                answer = await generate(question, retrieved)
+                results[idx] = (retrieved, answer)
+                if on_result:
+                    on_result(idx, retrieved, answer)
+
+        await asyncio.gather(produce(),
+                             *(consume() for _ in range(concurrency)))
+
+    return results
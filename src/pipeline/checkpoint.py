@@ -0,0 +1,88 @@
+"""
+Answer Checkpoint Module
+
+This module keeps an append-only JSONL file of completed answers so that a
+long `answer_dataset` run can be interrupted and resumed. Each line is one
+MinimalAnswer, written and flushed as soon as it is generated. Only the byte
+offset of each question's latest line is kept in memory; the final output is
+assembled by reading the answers back from the checkpoint in dataset order,
+so memory does not grow with the answers. Failed generations are recorded
+too, so they reach the output, but are answered again on resume. A line cut
+short by a crash is ignored.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Set
+
+from ..models.data_models import MinimalAnswer
+
+# Answers starting with this are failed generations, retried on resume
+FAILED_ANSWER_PREFIX = "Error generating answer:"
+
+
+class AnswerCheckpoint:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        # Question id -> byte offset of its latest record
+        self.offsets: Dict[str, int] = {}
+        self._file = None
+        self._reader = None
+
+    def load(self) -> Set[str]:
+        """Ids of questions answered so far, indexing their records"""
+        self.offsets = {}
+        answered = set()
+        if not self.path.exists():
+            return answered
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    record = MinimalAnswer.model_validate_json(line)
+                except (ValueError, TypeError):
+                    # Partially written last line, or not an answer
+                    record = None
+                if record is not None:
+                    self.offsets[record.question_id] = offset
+                    if record.answer.startswith(FAILED_ANSWER_PREFIX):
+                        answered.discard(record.question_id)
+                    else:
+                        answered.add(record.question_id)
+                offset += len(line)
+        return answered
+
+    def append(self, record: Dict[str, Any]):
+        """Persist one answer immediately"""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            torn = False
+            if self.path.exists() and self.path.stat().st_size:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, 2)
+                    torn = f.read(1) != b"\n"
+            self._file = open(self.path, 'ab')
+            # Start on a fresh line if the previous run died mid-write
+            if torn:
+                self._file.write(b"\n")
+        self.offsets[record['question_id']] = self._file.tell()
+        self._file.write(json.dumps(record).encode() + b"\n")
+        self._file.flush()
+
+    def read(self, question_id: str) -> Dict[str, Any]:
+        """The latest record of a question, read back from the file"""
+        if self._reader is None:
+            self._reader = open(self.path, 'rb')
+        self._reader.seek(self.offsets[question_id])
+        return json.loads(self._reader.readline())
+
+    def close(self):
+        for handle in (self._file, self._reader):
+            if handle is not None:
+                handle.close()
+        self._file = self._reader = None
+
+    def remove(self):
+        """Delete the checkpoint once the final output is written"""
+        self.close()
+        self.path.unlink(missing_ok=True)
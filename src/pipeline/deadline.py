@@ -0,0 +1,121 @@
+"""
+Deadline Planning Module
+
+This module sizes each answer request to a latency budget. It keeps moving
+averages of the measured cost of every stage (exact and tiered first-stage
+retrieval, re-ranking, time to first token per context token, and time per
+generated token) and, for a given deadline, picks the most thorough
+retrieval that fits its share of the budget and the largest context that
+still leaves time to generate an answer. Estimates start pessimistic and
+are refined by every observed request, so plans follow the current load.
+`DeadlineStream` enforces the deadline on generation itself: tokens are read
+by a worker thread, so waiting for a slow first token cannot hold the caller
+past the deadline.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator
+
+# Share of the deadline that retrieval (first stage plus re-ranking) may use
+RETRIEVAL_SHARE = 0.15
+
+
+class DeadlinePlanner:
+    def __init__(self, max_context_tokens: int = 1024,
+                 min_context_tokens: int = 128,
+                 min_answer_tokens: int = 8, alpha: float = 0.3):
+        self.max_context_tokens = max_context_tokens
+        self.min_context_tokens = min_context_tokens
+        self.min_answer_tokens = min_answer_tokens
+        self.alpha = alpha
+        # Milliseconds; replaced by measurements as requests complete
+        self.estimates = {
+            'first_stage': 50.0,
+            'fast_first_stage': 5.0,
+            'rerank': 50.0,
+            'first_token_per_context_token': 1.0,
+            'per_answer_token': 50.0,
+        }
+
+    def observe(self, stage: str, ms: float):
+        """Fold one measurement into the moving average of a stage"""
+        self.estimates[stage] += self.alpha * (ms - self.estimates[stage])
+
+    def plan(self, budget_ms: float) -> Dict[str, Any]:
+        """Retrieval options expected to fit the retrieval share of budget_ms
+
+        The context is sized separately, with context_tokens, once retrieval
+        has run and the time actually left is known.
+        """
+        est = self.estimates
+        retrieval_budget = budget_ms * RETRIEVAL_SHARE
+
+        fast = est['first_stage'] > retrieval_budget
+        retrieval = est['fast_first_stage'] if fast else est['first_stage']
+        rerank = retrieval + est['rerank'] <= retrieval_budget
+
+        return {'fast': fast, 'rerank': rerank}
+
+    def context_tokens(self, generation_ms: float) -> int:
+        """Largest context leaving time for a minimal answer
+
+        Falls back to the minimum context, accepting a truncated answer,
+        and returns 0 only when not even a first token is expected in time.
+        """
+        est = self.estimates
+        per_token = est['first_token_per_context_token']
+        if generation_ms < self.min_context_tokens * per_token:
+            return 0
+        prefill = generation_ms - self.min_answer_tokens * est['per_answer_token']
+        tokens = min(int(prefill / per_token), self.max_context_tokens)
+        return max(tokens, self.min_context_tokens)
+
+
+# Put by the worker when the stream is exhausted
+_DONE = object()
+
+
+class DeadlineStream:
+    """Tokens of a stream that arrive before a deadline (perf_counter time)
+
+    Iterating stops at the deadline, or when the stream ends, and sets
+    expired in the first case. The stream is drained by a daemon thread,
+    which closes it at the next token once close() has been called.
+    """
+
+    def __init__(self, stream: Iterator[str], deadline: float):
+        self.stream = stream
+        self.deadline = deadline
+        self.expired = False
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        try:
+            for token in self.stream:
+                if self._stop.is_set():
+                    break
+                self._queue.put(token)
+        finally:
+            self.stream.close()
+            self._queue.put(_DONE)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            remaining = self.deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    raise queue.Empty
+                token = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                self.expired = True
+                return
+            if token is _DONE:
+                return
+            yield token
+
+    def close(self):
+        self._stop.set()
@@ -0,0 +1,57 @@
+"""
+Question Deduplication Module
+
+This module groups near-duplicate questions so that one answer can serve a
+whole group. Each question is fingerprinted by its normalized words (the
+question minus stopwords) and the set of chunk ids retrieved for it; two
+fingerprints are compared by the mean of the Jaccard similarities of the
+two sets. Clustering is greedy: a question joins the first earlier cluster
+leader it is similar enough to, otherwise it leads a new cluster. Leaders
+are only compared with questions that share a retrieved chunk, found
+through an inverted index, so large datasets are not compared pairwise.
+"""
+
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from ..generation.compression import query_terms
+
+Fingerprint = Tuple[FrozenSet[str], FrozenSet[int]]
+
+
+def fingerprint(question: str, search_results) -> Fingerprint:
+    """Normalized question words and retrieved chunk ids"""
+    return (frozenset(query_terms(question)),
+            frozenset(doc_idx for doc_idx, _ in search_results))
+
+
+def similarity(first: Fingerprint, second: Fingerprint) -> float:
+    """Mean Jaccard similarity of the word sets and the chunk sets"""
+    return (_jaccard(first[0], second[0]) + _jaccard(first[1], second[1])) / 2
+
+
+def cluster_questions(questions: List[Dict[str, Any]], search_results: list,
+                      threshold: float = 0.8) -> List[List[int]]:
+    """Group question indices; each cluster lists its leader first"""
+    clusters = []
+    leaders = []
+    by_chunk = {}
+    for idx, (question, results) in enumerate(zip(questions, search_results)):
+        current = fingerprint(question['question'], results)
+        candidates = sorted({c for doc_idx in current[1]
+                             for c in by_chunk.get(doc_idx, ())})
+        for cluster_idx in candidates:
+            if similarity(current, leaders[cluster_idx]) >= threshold:
+                clusters[cluster_idx].append(idx)
+                break
+        else:
+            for doc_idx in current[1]:
+                by_chunk.setdefault(doc_idx, []).append(len(clusters))
+            clusters.append([idx])
+            leaders.append(current)
+    return clusters
+
+
+def _jaccard(first: FrozenSet, second: FrozenSet) -> float:
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
@@ -0,0 +1,81 @@
+"""
+Result Writer Module
+
+This module streams dataset results to disk one record at a time instead of
+collecting them into a StudentSearchResults model and dumping it at the end.
+Two layouts are written, chosen by the file suffix:
+
+    .json   the required schema, {"search_results": [...], "k": k}, with one
+            compact record per line so the file stays diffable
+    .jsonl  one record per line, nothing else
+
+Each record is validated against its pydantic model once as it is written
+(skippable for trusted records), and encoded with orjson when it is
+installed, falling back to the standard json module. Records go to a
+temporary file next to the output, which replaces it only when writing
+finishes cleanly, so an interrupted run leaves the previous results intact.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from ..models.data_models import MinimalSearchResults
+
+
+def dumps(record: Dict[str, Any]) -> bytes:
+    """Compact JSON encoding of record, with the fastest available encoder"""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record).encode()
+
+
+class ResultWriter:
+    def __init__(self, path: str, k: int,
+                 model: Type[BaseModel] = MinimalSearchResults,
+                 validate: bool = True):
+        self.path = Path(path)
+        self.k = k
+        self.model = model
+        self.validate = validate
+        self.jsonl = self.path.suffix == ".jsonl"
+        self.count = 0
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._tmp_path, 'wb')
+        if not self.jsonl:
+            self._file.write(b'{"search_results": [')
+        return self
+
+    def write(self, record: Dict[str, Any]):
+        """Append one result record"""
+        if self.validate:
+            self.model.model_validate(record)
+        if self.jsonl:
+            self._file.write(dumps(record) + b"\n")
+        else:
+            self._file.write((b",\n" if self.count else b"\n") + dumps(record))
+        self.count += 1
+
+    def __exit__(self, exc_type, *exc):
+        if not self.jsonl and exc_type is None:
+            self._file.write(f'\n], "k": {int(self.k)}}}\n'.encode())
+        self._file.close()
+        self._file = None
+        # An interrupted run keeps the previous output, not a short result
+        if exc_type is None:
+            os.replace(self._tmp_path, self.path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+        return False
@@ -0,0 +1,146 @@
+"""
+Memory Profiling Module
+
+This module measures where the memory of a loaded index goes. Two views are
+offered: `deep_sizeof` walks a structure and sums `sys.getsizeof` over every
+object it reaches (what the component keeps resident, shared objects counted
+once), and `AllocationMarks`
+records the bytes traced by `tracemalloc` between load stages (what loading
+the component allocated, including transient copies). Helpers summarize the
+postings (document frequency) distribution and chunk sizes, and project the
+footprint to a larger corpus: per-chunk structures grow linearly, while the
+vocabulary-keyed ones grow by Heaps' law with an exponent fitted on the
+index itself.
+"""
+
+import bisect
+import math
+import sys
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Set
+
+# Upper bounds of the chunk size histogram buckets, in characters
+CHUNK_SIZE_BUCKETS = [256, 512, 1024, 2048, 4096]
+# Upper bounds of the document frequency buckets
+POSTINGS_BUCKETS = [1, 3, 10, 100, 1000]
+
+
+def deep_sizeof(obj: Any, seen: Set[int] = None) -> int:
+    """Bytes held by obj and everything it references, each object once
+
+    Pass the same seen set when sizing several components, so objects they
+    share (e.g. vocabulary strings) are counted for the first one only.
+    """
+    if seen is None:
+        seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__'):
+            stack.append(vars(current))
+        elif hasattr(current, '__slots__'):
+            stack.extend(getattr(current, slot) for slot in current.__slots__
+                         if hasattr(current, slot))
+    return total
+
+
+class AllocationMarks:
+    """Bytes traced by tracemalloc between successive marks"""
+
+    def __init__(self):
+        self.stages: Dict[str, int] = {}
+        self.peak = 0
+        self.retained = 0
+        self._last = 0
+
+    def __enter__(self):
+        tracemalloc.start()
+        self._last = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def mark(self, stage: str):
+        current = tracemalloc.get_traced_memory()[0]
+        self.stages[stage] = self.stages.get(stage, 0) + current - self._last
+        self._last = current
+
+    def __exit__(self, *exc):
+        self.retained, self.peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return False
+
+
+def postings_distribution(doc_freqs: Dict[str, int]) -> Dict[str, Any]:
+    """Terms and postings per document frequency bucket, plus percentiles"""
+    freqs = sorted(doc_freqs.values())
+    labels = _bucket_labels(POSTINGS_BUCKETS)
+    buckets = {label: [0, 0] for label in labels}
+    for df in freqs:
+        entry = buckets[labels[bisect.bisect_left(POSTINGS_BUCKETS, df)]]
+        entry[0] += 1
+        entry[1] += df
+    if not freqs:
+        return {'terms': 0, 'postings': 0, 'buckets': buckets}
+    return {
+        'terms': len(freqs),
+        'postings': sum(freqs),
+        'median': freqs[len(freqs) // 2],
+        'p99': freqs[min(int(len(freqs) * 0.99), len(freqs) - 1)],
+        'max': freqs[-1],
+        'buckets': buckets,
+    }
+
+
+def chunk_size_histogram(chunks: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Chunk counts per content-length bucket, for each chunk_type"""
+    histogram = {}
+    for chunk in chunks:
+        counts = histogram.setdefault(chunk.get('chunk_type', ''),
+                                      [0] * (len(CHUNK_SIZE_BUCKETS) + 1))
+        counts[bisect.bisect_left(CHUNK_SIZE_BUCKETS,
+                                  len(chunk['content']))] += 1
+    return histogram
+
+
+def heaps_exponent(tokenized_docs: List[List[str]]) -> float:
+    """Vocabulary growth exponent, from the first half versus all tokens"""
+    half = len(tokenized_docs) // 2
+    first_terms, first_tokens = _vocabulary(tokenized_docs[:half])
+    all_terms, all_tokens = _vocabulary(tokenized_docs)
+    if not first_terms or all_tokens <= first_tokens:
+        return 1.0
+    exponent = (math.log(len(all_terms) / len(first_terms))
+                / math.log(all_tokens / first_tokens))
+    return min(max(exponent, 0.0), 1.0)
+
+
+def project_bytes(linear: int, vocabulary: int, scale: float,
+                  exponent: float) -> int:
+    """Footprint at scale times the corpus size"""
+    return int(linear * scale + vocabulary * scale ** exponent)
+
+
+def _vocabulary(tokenized_docs: Iterable[List[str]]):
+    terms, tokens = set(), 0
+    for doc in tokenized_docs:
+        terms.update(doc)
+        tokens += len(doc)
+    return terms, tokens
+
+
+def _bucket_labels(bounds: List[int]) -> List[str]:
+    labels, low = [], 1
+    for bound in bounds:
+        labels.append(str(bound) if bound == low else f"{low}-{bound}")
+        low = bound + 1
+    labels.append(f">{bounds[-1]}")
+    return labels
@@ -0,0 +1,115 @@
+"""
+Tracing Module
+
+This module provides lightweight span instrumentation for the pipeline.
+Code marks a stage with `with span("scoring"):`; while tracing is disabled
+(the default) this returns a shared no-op context manager, so instrumented
+hot paths pay one attribute check per span. When enabled, every span records
+its name, thread, nesting depth, start and duration, which can be summarized
+per stage or exported in the Chrome trace event format (open in
+chrome://tracing or https://ui.perfetto.dev).
+"""
+
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+# Nesting depth; a context variable so threads and asyncio tasks each nest
+# their own spans
+_depth = ContextVar('span_depth', default=0)
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'start', 'depth')
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.depth = _depth.get()
+        _depth.set(self.depth + 1)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        _depth.set(self.depth)
+        self.tracer._record(self.name, self.start, duration, self.depth)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+        self._origin = time.perf_counter()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def _record(self, name: str, start: float, duration: float, depth: int):
+        with self._lock:
+            self.spans.append((name, start, duration,
+                               threading.get_ident(), depth))
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-stage count and total/mean/max milliseconds, costliest first"""
+        stages = {}
+        for name, _, duration, _, depth in self.spans:
+            stage = stages.setdefault(name, {'stage': name, 'count': 0,
+                                             'total_ms': 0.0, 'max_ms': 0.0,
+                                             'depth': depth})
+            stage['count'] += 1
+            stage['total_ms'] += duration * 1000
+            stage['max_ms'] = max(stage['max_ms'], duration * 1000)
+            stage['depth'] = min(stage['depth'], depth)
+        for stage in stages.values():
+            stage['mean_ms'] = stage['total_ms'] / stage['count']
+        return sorted(stages.values(), key=lambda s: -s['total_ms'])
+
+    def print_summary(self):
+        print(f"\n{'stage':<24}{'calls':>8}{'total ms':>12}"
+              f"{'mean ms':>10}{'max ms':>10}")
+        for stage in self.summary():
+            name = "  " * stage['depth'] + stage['stage']
+            print(f"{name:<24}{stage['count']:>8}{stage['total_ms']:>12.2f}"
+                  f"{stage['mean_ms']:>10.3f}{stage['max_ms']:>10.3f}")
+
+    def export_chrome_trace(self, path: str):
+        """Write spans as Chrome trace 'complete' events"""
+        pid = os.getpid()
+        events = [{
+            'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6,
+        } for name, start, duration, tid, _ in self.spans]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+TRACER = Tracer()
+
+
+def span(name: str):
+    """Context manager timing one stage under the global tracer"""
+    return TRACER.span(name)
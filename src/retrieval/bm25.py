@@ -1,8 +1,12 @@
 import math
 from collections import defaultdict, Counter
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 import re
 
+from .tiered import TieredIndex
+from ..profiling.tracing import span
+from .vocabulary import SortedVocabulary
+
 
 class BM25Retriever:
     def __init__(self, k1: float = 1.5, b: float = 0.75):
@@ -13,6 +17,8 @@ class BM25Retriever:
         self.idf = {}
         self.doc_len = []
         self.avgdl = 0
+        self.tiers = None
+        self.vocabulary = None
 
     def _tokenize(self, text: str) -> List[str]:
         # Simple tokenization - can be enhanced
@@ -23,50 +29,94 @@ class BM25Retriever:
 
         # Tokenize all documents
         tokenized_docs = []
-        for chunk in chunks:
-            tokens = self._tokenize(chunk['content'])
-            tokenized_docs.append(tokens)
-            self.doc_len.append(len(tokens))
+        with span("tokenize"):
+            for chunk in chunks:
+                tokens = self._tokenize(chunk['content'])
+                tokenized_docs.append(tokens)
+                self.doc_len.append(len(tokens))
 
         self.avgdl = sum(self.doc_len) / len(self.doc_len)
 
-        # Calculate document frequencies
-        for tokens in tokenized_docs:
-            unique_tokens = set(tokens)
-            for token in unique_tokens:
-                self.doc_freqs[token] += 1
+        with span("index_build"):
+            # Calculate document frequencies
+            for tokens in tokenized_docs:
+                unique_tokens = set(tokens)
+                for token in unique_tokens:
+                    self.doc_freqs[token] += 1
 
-        # Calculate IDF values
-        num_docs = len(tokenized_docs)
-        for token, freq in self.doc_freqs.items():
-            self.idf[token] = math.log((num_docs - freq + 0.5) / (freq + 0.5))
+            # Calculate IDF values
+            num_docs = len(tokenized_docs)
+            for token, freq in self.doc_freqs.items():
+                self.idf[token] = math.log((num_docs - freq + 0.5) / (freq + 0.5))
 
         self.tokenized_docs = tokenized_docs
 
-    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
-        query_tokens = self._tokenize(query)
-        scores = []
+    def _term_score(self, token: str, tf: int, doc_idx: int) -> float:
+        """BM25 contribution of a single term to a single document"""
+        idf = self.idf.get(token, 0)
+        doc_len = self.doc_len[doc_idx]
+        return idf * (tf * (self.k1 + 1)) / (
+            tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
+        )
+
+    def build_tiers(self, tier_fraction: float = 0.1) -> TieredIndex:
+        """Build the impact-ordered tiered index used by fast searches"""
+        self.tiers = TieredIndex(tier_fraction)
+        self.tiers.build(self)
+        return self.tiers
+
+    def expand_query(self, query_tokens: List[str],
+                     max_expansions: int = 3) -> List[Tuple[str, float]]:
+        """Replace out-of-vocabulary tokens by weighted prefix/typo matches"""
+        if self.vocabulary is None:
+            self.vocabulary = SortedVocabulary(self.idf)
+
+        weighted = []
+        for token in query_tokens:
+            if token in self.idf:
+                weighted.append((token, 1.0))
+            else:
+                weighted.extend(self.vocabulary.expand(
+                    token, self.idf, max_expansions))
+        return weighted
+
+    def search(self, query: str, k: int = 10, fast: bool = False,
+               candidates: Optional[List[int]] = None,
+               expand: bool = False) -> List[Tuple[int, float]]:
+        with span("query_tokenize"):
+            query_tokens = self._tokenize(query)
+            if expand:
+                query_terms = self.expand_query(query_tokens)
+            else:
+                query_terms = [(token, 1.0) for token in query_tokens]
+
+        # Tiers are never built here: that costs far more than the exact
+        # search below, so fast without a tiered index is exact search
+        if fast and self.tiers is not None:
+            allowed = set(candidates) if candidates is not None else None
+            with span("scoring"):
+                return self.tiers.search(query_terms, k, allowed)
+
+        if candidates is None:
+            candidates = range(len(self.tokenized_docs))
 
-        for i, doc_tokens in enumerate(self.tokenized_docs):
-            score = 0
-            doc_len = self.doc_len[i]
+        scores = []
 
-            # Count term frequencies in document
-            doc_tf = Counter(doc_tokens)
+        with span("scoring"):
+            for i in candidates:
+                doc_tokens = self.tokenized_docs[i]
+                score = 0
 
-            for token in query_tokens:
-                if token in doc_tf:
-                    tf = doc_tf[token]
-                    idf = self.idf.get(token, 0)
+                # Count term frequencies in document
+                doc_tf = Counter(doc_tokens)
 
-                    # BM25 formula
-                    score += idf * (tf * (self.k1 + 1)) / (
-                        tf + self.k1 *
-                        (1 - self.b + self.b * doc_len / self.avgdl)
-                    )
+                for token, weight in query_terms:
+                    if token in doc_tf:
+                        score += weight * self._term_score(token, doc_tf[token], i)
 
-            scores.append((i, score))
+                scores.append((i, score))
 
         # Sort by score and return top k
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return scores[:k]
+        with span("top_k"):
+            scores.sort(key=lambda x: x[1], reverse=True)
+            return scores[:k]
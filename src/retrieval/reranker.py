@@ -0,0 +1,115 @@
+"""
+Proximity Re-ranker Module
+
+This module implements a cheap second ranking stage that runs over the top-N
+candidates of a first-stage BM25 search. For each candidate it computes a
+term-proximity feature (the smallest token window covering the matched query
+terms) and an identifier-match feature (query identifiers such as
+`generate_answer` or `OllamaClient` that the chunk defines or mentions), then
+blends them with the normalised BM25 score. Work is bounded by a strict
+per-query time budget: candidates that cannot be scored in time keep their
+first-stage order below the re-ranked ones.
+"""
+
+import re
+import time
+from typing import List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .bm25 import BM25Retriever
+
+
+def extract_identifiers(query: str) -> List[str]:
+    """Code identifiers in a query: snake_case, CamelCase, dotted or `quoted`"""
+    identifiers = []
+    for word in re.findall(r'`[^`]+`|[A-Za-z_][\w.]*\w', query):
+        quoted = word.startswith('`')
+        word = word.strip('`').rstrip('()')
+        dotted = '.' in word and all(len(p) > 1 for p in word.split('.'))
+        if quoted or dotted or '_' in word or (
+                re.search(r'.[A-Z]', word) and re.search(r'[a-z]', word)):
+            identifiers.append(word)
+    return identifiers
+
+
+class ProximityReranker:
+    def __init__(self, depth: int = 200, budget_ms: float = 50.0,
+                 proximity_weight: float = 0.3,
+                 identifier_weight: float = 0.5):
+        self.depth = depth
+        self.budget_ms = budget_ms
+        self.proximity_weight = proximity_weight
+        self.identifier_weight = identifier_weight
+        self.last_scored = 0
+
+    def rerank(self, retriever: "BM25Retriever", query: str,
+               candidates: List[Tuple[int, float]],
+               k: int = 10) -> List[Tuple[int, float]]:
+        """Re-rank first-stage candidates and return the final top-k"""
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        # Only informative terms count towards proximity
+        query_terms = [t for t in dict.fromkeys(retriever._tokenize(query))
+                       if retriever.idf.get(t, 0) > 0]
+        identifiers = [part.lower() for name in extract_identifiers(query)
+                       for part in name.split('.') if part]
+
+        max_score = max((abs(s) for _, s in candidates), default=0) or 1.0
+        rescored = []
+        for doc_idx, score in candidates[:self.depth]:
+            if time.perf_counter() > deadline:
+                break
+            tokens = retriever.tokenized_docs[doc_idx]
+            content = retriever.documents[doc_idx]['content']
+            rescored.append((doc_idx, score / max_score
+                             + self.proximity_weight
+                             * self._proximity(tokens, query_terms)
+                             + self.identifier_weight
+                             * self._identifier_match(tokens, content,
+                                                      identifiers)))
+
+        self.last_scored = len(rescored)
+        rescored.sort(key=lambda x: x[1], reverse=True)
+        return (rescored + candidates[len(rescored):])[:k]
+
+    @staticmethod
+    def _proximity(tokens: List[str], query_terms: List[str]) -> float:
+        """Matched terms per token of the tightest window covering them"""
+        wanted = set(query_terms)
+        positions = [(pos, tok) for pos, tok in enumerate(tokens)
+                     if tok in wanted]
+        matched = len({tok for _, tok in positions})
+        if matched < 2:
+            return 0.0
+
+        # Sliding window over the matched positions
+        best = len(tokens)
+        counts = {}
+        left = 0
+        for pos, tok in positions:
+            counts[tok] = counts.get(tok, 0) + 1
+            while len(counts) == matched:
+                left_pos, left_tok = positions[left]
+                best = min(best, pos - left_pos + 1)
+                counts[left_tok] -= 1
+                if counts[left_tok] == 0:
+                    del counts[left_tok]
+                left += 1
+
+        return (matched / len(wanted)) * (matched / best)
+
+    @staticmethod
+    def _identifier_match(tokens: List[str], content: str,
+                          identifiers: List[str]) -> float:
+        """Fraction of query identifiers present, with a bonus if defined"""
+        if not identifiers:
+            return 0.0
+        token_set = set(tokens)
+        lowered = content.lower()
+        score = 0.0
+        for name in identifiers:
+            if name in token_set:
+                score += 1.0
+                if re.search(rf'\b(?:def|class)\s+{re.escape(name)}\b',
+                             lowered):
+                    score += 1.0
+        return score / (2 * len(identifiers))
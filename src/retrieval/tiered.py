@@ -0,0 +1,82 @@
+"""
+Tiered Index Module
+
+This module implements an impact-ordered inverted index on top of a fitted
+BM25Retriever. Each term's postings are sorted by their BM25 contribution
+(the "impact") and split into a small high-impact first tier and the rest.
+Fast searches score only the first tier and fall back to the second tier
+when the first one cannot fill the requested top-k.
+"""
+
+import heapq
+from collections import Counter, defaultdict
+from typing import List, Dict, Tuple, Set, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .bm25 import BM25Retriever
+
+
+class TieredIndex:
+    def __init__(self, tier_fraction: float = 0.1, min_tier_size: int = 64):
+        self.tier_fraction = tier_fraction
+        self.min_tier_size = min_tier_size
+        # term -> [(doc_idx, impact), ...] sorted by impact, descending
+        self.first_tier: Dict[str, List[Tuple[int, float]]] = {}
+        self.second_tier: Dict[str, List[Tuple[int, float]]] = {}
+
+    def build(self, retriever: "BM25Retriever"):
+        """Build impact-sorted tiers from a fitted retriever"""
+        postings = defaultdict(list)
+        for doc_idx, tokens in enumerate(retriever.tokenized_docs):
+            for token, tf in Counter(tokens).items():
+                impact = retriever._term_score(token, tf, doc_idx)
+                postings[token].append((doc_idx, impact))
+
+        self.first_tier = {}
+        self.second_tier = {}
+        for token, plist in postings.items():
+            plist.sort(key=lambda p: p[1], reverse=True)
+            cut = max(self.min_tier_size,
+                      int(len(plist) * self.tier_fraction))
+            self.first_tier[token] = plist[:cut]
+            if len(plist) > cut:
+                self.second_tier[token] = plist[cut:]
+
+    def search(self, query_terms: List[Tuple[str, float]], k: int = 10,
+               allowed: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """Approximate top-k using the first tier, widening if needed"""
+        scores = defaultdict(float)
+        self._accumulate(scores, self.first_tier, query_terms, allowed)
+
+        if len(scores) < k:
+            # First tier cannot fill top-k: consult the remaining postings
+            self._accumulate(scores, self.second_tier, query_terms, allowed)
+
+        return heapq.nlargest(k, scores.items(), key=lambda x: x[1])
+
+    @staticmethod
+    def _accumulate(scores: Dict[int, float],
+                    tier: Dict[str, List[Tuple[int, float]]],
+                    query_terms: List[Tuple[str, float]],
+                    allowed: Optional[Set[int]]):
+        for token, weight in query_terms:
+            for doc_idx, impact in tier.get(token, ()):
+                if allowed is None or doc_idx in allowed:
+                    scores[doc_idx] += weight * impact
+
+    def to_dict(self) -> Dict:
+        return {
+            'tier_fraction': self.tier_fraction,
+            'min_tier_size': self.min_tier_size,
+            'first_tier': self.first_tier,
+            'second_tier': self.second_tier,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TieredIndex":
+        index = cls(data['tier_fraction'], data['min_tier_size'])
+        index.first_tier = {t: [tuple(p) for p in plist]
+                            for t, plist in data['first_tier'].items()}
+        index.second_tier = {t: [tuple(p) for p in plist]
+                             for t, plist in data['second_tier'].items()}
+        return index
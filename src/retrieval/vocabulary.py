@@ -0,0 +1,121 @@
+"""
+Vocabulary Module
+
+This module provides a compact sorted-array vocabulary used to expand query
+terms that do not exist in the index, such as partial identifiers
+(`generate_answ`) or typos (`ollamaclinet`). The sorted term list acts as an
+implicit trie: prefix enumeration is a binary search plus a bounded scan, and
+edit-distance search walks the terms in order, reusing dynamic-programming
+rows for shared prefixes and skipping every term under a prefix that can no
+longer match. Expansions are capped and ranked by IDF so query cost stays
+predictable on very large vocabularies.
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+
+class SortedVocabulary:
+    def __init__(self, terms: Iterable[str]):
+        # Timsort is linear when the terms are already sorted on disk
+        self.terms: List[str] = sorted(terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def prefix(self, prefix: str, limit: int = 1000) -> List[str]:
+        """Terms starting with prefix, at most limit of them"""
+        start = bisect_left(self.terms, prefix)
+        matches = []
+        for term in self.terms[start:start + limit]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def fuzzy(self, word: str, max_edits: int = 1, limit: int = 1000,
+              prefix_length: int = 1) -> List[Tuple[str, int]]:
+        """Terms within max_edits (Damerau, restricted) of word
+
+        Like Lucene's fuzzy queries, the first prefix_length characters must
+        match exactly, which bounds the scan to one slice of the vocabulary.
+        """
+        n = len(word)
+        # rows[d] is the DP row for the first d characters of the term
+        rows = [list(range(n + 1))]
+        matches = []
+        previous = ""
+
+        fixed = word[:prefix_length]
+        i = bisect_left(self.terms, fixed)
+        end = self._skip_prefix(fixed, i) if fixed else len(self.terms)
+
+        while i < end and len(matches) < limit:
+            term = self.terms[i]
+            shared = 0
+            max_shared = min(len(term), len(previous), len(rows) - 1)
+            while shared < max_shared and term[shared] == previous[shared]:
+                shared += 1
+            del rows[shared + 1:]
+
+            pruned_at = None
+            for d in range(shared + 1, len(term) + 1):
+                rows.append(self._next_row(word, term, d, rows))
+                if min(rows[d]) > max_edits:
+                    pruned_at = d
+                    break
+
+            if pruned_at is not None:
+                # No term under this prefix can come within max_edits
+                i = self._skip_prefix(term[:pruned_at], i)
+                previous = term[:pruned_at]
+                del rows[pruned_at:]
+                continue
+
+            if rows[len(term)][n] <= max_edits:
+                matches.append((term, rows[len(term)][n]))
+            previous = term
+            i += 1
+
+        return matches
+
+    def expand(self, token: str, idf: Dict[str, float],
+               max_expansions: int = 3, min_prefix: int = 3,
+               scan_limit: int = 1000) -> List[Tuple[str, float]]:
+        """Weighted replacement terms for an out-of-vocabulary token"""
+        candidates = {}
+
+        if len(token) >= min_prefix:
+            for term in self.prefix(token, scan_limit):
+                candidates[term] = len(token) / len(term)
+
+        max_edits = 1 if len(token) <= 5 else 2
+        if len(token) > max_edits + 1:
+            for term, edits in self.fuzzy(token, max_edits, scan_limit):
+                weight = 1.0 / (1 + edits)
+                candidates[term] = max(candidates.get(term, 0.0), weight)
+
+        ranked = sorted(candidates.items(),
+                        key=lambda x: x[1] * max(idf.get(x[0], 0.0), 0.0),
+                        reverse=True)
+        return ranked[:max_expansions]
+
+    @staticmethod
+    def _next_row(word: str, term: str, d: int,
+                  rows: List[List[int]]) -> List[int]:
+        prev = rows[d - 1]
+        char = term[d - 1]
+        row = [d]
+        for j in range(1, len(word) + 1):
+            cost = 0 if word[j - 1] == char else 1
+            value = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if (d > 1 and j > 1 and char == word[j - 2]
+                    and term[d - 2] == word[j - 1]):
+                value = min(value, rows[d - 2][j - 2] + 1)
+            row.append(value)
+        return row
+
+    def _skip_prefix(self, prefix: str, i: int) -> int:
+        """Index of the first term after i that does not start with prefix"""
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return bisect_left(self.terms, upper, i)
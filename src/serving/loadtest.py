@@ -0,0 +1,232 @@
+"""
+Load Test Module
+
+This module replays questions against the query path to size hardware. The
+target is either a RAGSystem in this process (retrieval serialized by a lock,
+as in the query server) or a running query server reached over HTTP. Load
+is generated in one of two ways:
+
+    open loop    requests are issued at a fixed rate (qps) by a dispatcher
+                 and served by a pool of client threads; latency is measured
+                 from the scheduled send time, so queueing behind a
+                 saturated target is counted instead of hidden
+    closed loop  N clients each send their next request as soon as the
+                 previous one returns
+
+Every interval a row is reported with throughput, latency percentiles,
+errors and CPU utilisation: of this process (which does the work for the
+in-process target) and of the whole machine from /proc/stat when available
+(which covers a server running on the same host).
+"""
+
+import http.client
+import itertools
+import json
+import queue
+import threading
+from collections import Counter
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class InProcessTarget:
+    def __init__(self, rag, endpoint: str = "search", k: int = 10,
+                 options: Dict[str, Any] = None):
+        self.rag = rag
+        self.endpoint = endpoint
+        self.k = k
+        self.options = options or {}
+        self.lock = threading.Lock()
+
+    def __call__(self, question: str):
+        with self.lock:
+            results = self.rag._retrieve(question, self.k, **self.options)
+        if self.endpoint == "answer":
+            self.rag.llm_client.generate_answer(
+                question, [self.rag.chunks[doc_idx] for doc_idx, _ in results])
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpTarget:
+    def __init__(self, url: str, endpoint: str = "search", k: int = 10,
+                 options: Dict[str, Any] = None, timeout: float = 300):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.path = f"{parsed.path.rstrip('/')}/{endpoint}"
+        self.field = 'query' if endpoint == "search" else 'question'
+        self.k = k
+        self.options = options or {}
+        self.timeout = timeout
+        # One kept-alive connection per client thread
+        self.local = threading.local()
+
+    def __call__(self, question: str):
+        body = json.dumps(
+            {self.field: question, 'k': self.k, **self.options}).encode()
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port,
+                                                    timeout=self.timeout)
+            self.local.connection = connection
+        try:
+            connection.request("POST", self.path, body,
+                               {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            self.local.connection = None
+            raise
+        if response.status != 200:
+            raise HttpError(f"HTTP {response.status}")
+
+
+class CpuSampler:
+    """CPU utilisation since the previous sample, in percent"""
+
+    def __init__(self):
+        self.process = time.process_time()
+        self.wall = time.perf_counter()
+        self.system = self._system_times()
+
+    def sample(self) -> Dict[str, Optional[float]]:
+        process, wall = time.process_time(), time.perf_counter()
+        system = self._system_times()
+        elapsed = max(wall - self.wall, 1e-9)
+        # Of one core, like top; above 100 when threads run in parallel
+        usage = {'process_cpu': (process - self.process) / elapsed * 100,
+                 'system_cpu': None}
+        if system and self.system and system[1] > self.system[1]:
+            busy = system[0] - self.system[0]
+            usage['system_cpu'] = busy / (system[1] - self.system[1]) * 100
+        self.process, self.wall, self.system = process, wall, system
+        return usage
+
+    @staticmethod
+    def _system_times():
+        """(busy, total) jiffies of all CPUs, or None off Linux"""
+        try:
+            with open("/proc/stat") as f:
+                values = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        return sum(values) - idle, sum(values)
+
+
+class LoadGenerator:
+    def __init__(self, target: Callable[[str], Any], questions: List[str],
+                 qps: float = 0, clients: int = 4, duration: float = 30,
+                 interval: float = 1.0):
+        self.target = target
+        self.questions = itertools.cycle(questions)
+        self.questions_lock = threading.Lock()
+        self.qps = qps
+        self.clients = clients
+        self.duration = duration
+        self.interval = interval
+        # (completed at, latency seconds, error name or None)
+        self.records = []
+        self.timeline = []
+
+    def run(self, on_interval: Callable[[Dict[str, Any]], None] = None
+            ) -> Dict[str, Any]:
+        """Generate load for duration seconds; returns the summary"""
+        self.start = time.perf_counter()
+        self.stop_at = self.start + self.duration
+        if self.qps > 0:
+            threads = self._open_loop()
+        else:
+            threads = [threading.Thread(target=self._closed_client, daemon=True)
+                       for _ in range(self.clients)]
+        for thread in threads:
+            thread.start()
+
+        cpu = CpuSampler()
+        last, reported = self.start, 0
+        while True:
+            running = any(thread.is_alive() for thread in threads)
+            now = time.perf_counter()
+            if now - last >= self.interval or not running:
+                records = self.records[reported:]
+                reported += len(records)
+                if records or running:
+                    row = {'t': now - self.start,
+                           'qps': len(records) / max(now - last, 1e-9),
+                           **self._stats(records), **cpu.sample()}
+                    self.timeline.append(row)
+                    if on_interval:
+                        on_interval(row)
+                last = now
+            if not running:
+                break
+            time.sleep(0.05)
+
+        summary = self._stats(self.records)
+        summary['duration_s'] = time.perf_counter() - self.start
+        summary['throughput'] = summary['requests'] / summary['duration_s']
+        summary['errors_by_type'] = dict(Counter(
+            error for _, _, error in self.records if error))
+        return summary
+
+    def _open_loop(self) -> List[threading.Thread]:
+        pending = queue.Queue()
+
+        def dispatch():
+            for i in itertools.count():
+                scheduled = self.start + i / self.qps
+                if scheduled >= self.stop_at:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pending.put(scheduled)
+            for _ in range(self.clients):
+                pending.put(None)
+
+        def client():
+            while True:
+                scheduled = pending.get()
+                if scheduled is None:
+                    return
+                self._issue(scheduled)
+
+        return [threading.Thread(target=dispatch, daemon=True)] + [
+            threading.Thread(target=client, daemon=True)
+            for _ in range(self.clients)]
+
+    def _closed_client(self):
+        while time.perf_counter() < self.stop_at:
+            self._issue(time.perf_counter())
+
+    def _issue(self, sent: float):
+        with self.questions_lock:
+            question = next(self.questions)
+        error = None
+        try:
+            self.target(question)
+        except Exception as e:
+            error = str(e) if isinstance(e, HttpError) else type(e).__name__
+        done = time.perf_counter()
+        self.records.append((done - self.start, done - sent, error))
+
+    def _stats(self, records) -> Dict[str, Any]:
+        latencies = sorted(latency for _, latency, _ in records)
+        errors = sum(1 for record in records if record[2])
+        stats = {'requests': len(records), 'errors': errors,
+                 'error_rate': errors / len(records) if records else 0.0}
+        for pct in (50, 90, 95, 99):
+            stats[f'p{pct}_ms'] = (_percentile(latencies, pct) * 1000
+                                   if latencies else None)
+        stats['max_ms'] = latencies[-1] * 1000 if latencies else None
+        return stats
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * pct / 100),
+                             len(sorted_values) - 1)]
@@ -0,0 +1,179 @@
+"""
+Query Server Module
+
+This module exposes a loaded RAGSystem over HTTP so that the index is loaded
+once and shared by many requests. It uses only the standard library.
+
+    POST /search  {"query": "...", "k": 10, ...retrieval options}
+    POST /answer  {"question": "...", "k": 10, "stream": true, ...}
+                  {"question": "...", "deadline_ms": 2000, ...}
+
+Streaming answers are sent as newline-delimited JSON: one {"token": ...}
+line per generated token, then a final line holding the MinimalAnswer
+result and the request's time-to-first-token and tokens/sec. With
+`deadline_ms`, retrieval and context are sized to the budget and the answer
+is cut off at the deadline; the result then carries `"partial": true`.
+Malformed requests get a 400 and unexpected failures a 500, with an
+{"error": ...} body; a stream that fails after it started ends with an
+{"error": ...} line instead.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from ..models.data_models import (
+    MinimalAnswer, MinimalSearchResults, StudentSearchResults,
+    StudentSearchResultsAndAnswer,
+)
+
+RETRIEVAL_OPTIONS = ('fast', 'filters', 'rerank', 'expand', 'symbols')
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this, keep-alive
+    # clients wait out delayed ACKs (~40 ms) on every response
+    disable_nagle_algorithm = True
+    rag = None
+    # Retrieval state (stage timings, filter cache) is shared per system
+    retrieval_lock = threading.Lock()
+
+    def do_POST(self):
+        self._streaming = False
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            if self.path == "/search":
+                self._search(request)
+            elif self.path == "/answer":
+                self._answer(request)
+            else:
+                self._send_json({"error": f"Unknown endpoint {self.path}"}, 404)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_error(e, 400)
+        except Exception as e:
+            self._send_error(e, 500)
+
+    def _send_error(self, error: Exception, status: int):
+        """Report a failed request; mid-stream, as a last NDJSON line"""
+        message = str(error) if status == 400 else (
+            f"Internal error: {type(error).__name__}: {error}")
+        if not self._streaming:
+            self._send_json({"error": message}, status)
+            return
+        # The status line is already sent; end the stream and the connection
+        self.close_connection = True
+        try:
+            self._write_chunk({"error": message})
+            self.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            pass
+
+    def _retrieve(self, query: str, request: Dict[str, Any]):
+        k = int(request.get('k', 10))
+        options = {o: request[o] for o in RETRIEVAL_OPTIONS if o in request}
+        with self.retrieval_lock:
+            results = self.rag._retrieve(query, k, **options)
+        return k, results
+
+    def _search(self, request: Dict[str, Any]):
+        k, results = self._retrieve(request['query'], request)
+        output = StudentSearchResults(search_results=[MinimalSearchResults(
+            question_id=request.get('question_id', 'single_query'),
+            retrieved_sources=self.rag._format_sources(results),
+        )], k=k)
+        self._send_json(output.model_dump())
+
+    def _answer(self, request: Dict[str, Any]):
+        if request.get('deadline_ms'):
+            self._answer_with_deadline(request)
+            return
+        question = request['question']
+        k, results = self._retrieve(question, request)
+        context_chunks = [self.rag.chunks[doc_idx] for doc_idx, _ in results]
+        llm_client = self.rag.llm_client
+
+        if not request.get('stream'):
+            answer = llm_client.generate_answer(question, context_chunks)
+            output = StudentSearchResultsAndAnswer(search_results=[
+                self._minimal_answer(request, results, answer)], k=k)
+            self._send_json(output.model_dump())
+            return
+
+        self._start_stream()
+        stats, pieces = {}, []
+        for token in llm_client.stream_answer(question, context_chunks, stats):
+            pieces.append(token)
+            self._write_chunk({"token": token})
+        self._write_chunk({
+            "result": self._minimal_answer(
+                request, results, "".join(pieces)).model_dump(),
+            "stats": stats,
+        })
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _answer_with_deadline(self, request: Dict[str, Any]):
+        k = int(request.get('k', 10))
+        options = {o: request[o] for o in RETRIEVAL_OPTIONS
+                   if o in request and o != 'rerank'}
+        stream = request.get('stream')
+        if stream:
+            self._start_stream()
+        results, answer, partial = self.rag._answer_with_deadline(
+            request['question'], k, float(request['deadline_ms']), options,
+            on_token=(lambda token: self._write_chunk({"token": token}))
+            if stream else None,
+            retrieval_lock=self.retrieval_lock)
+
+        result = self._minimal_answer(request, results, answer)
+        if stream:
+            self._write_chunk({"result": result.model_dump(), "partial": partial})
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            output = StudentSearchResultsAndAnswer(search_results=[result], k=k)
+            self._send_json(dict(output.model_dump(), partial=partial))
+
+    def _start_stream(self):
+        self._streaming = True
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _minimal_answer(self, request: Dict[str, Any], results,
+                        answer: str) -> MinimalAnswer:
+        return MinimalAnswer(
+            question_id=request.get('question_id', 'single_query'),
+            retrieved_sources=self.rag._format_sources(results),
+            answer=answer,
+        )
+
+    def _write_chunk(self, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(rag, host: str = "127.0.0.1",
+                port: int = 8000) -> ThreadingHTTPServer:
+    """Create a threaded HTTP server bound to a loaded RAGSystem"""
+    handler = type("Handler", (QueryRequestHandler,), {
+        "rag": rag, "retrieval_lock": threading.Lock()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -10,6 +10,7 @@ This script demonstrates all capabilities of the RAG system:
 5. Structured JSON output generation
 6. CLI interface usage
 7. Evaluation metrics and performance analysis
+8. Concurrent answering against a mock LLM server
 """
 
 import json
@@ -19,6 +20,7 @@ from pathlib import Path
 from src.indexing.indexer import RepositoryIndexer
 from src.retrieval.bm25 import BM25Retriever
 from src.generation.llm_client import OllamaClient
+from src.generation.cache import ResponseCache
 from src.models.data_models import *
 from src.evaluation.metrics import calculate_recall_at_k, calculate_overlap
 from src.chunking.code_chunker import PythonCodeChunker
@@ -279,7 +281,7 @@ The system supports multiple retrieval strategies...
 
         # Generate answer
         print("\n  Generating answer using Ollama (qwen3:0.6b)...")
-        llm_client = OllamaClient()
+        llm_client = OllamaClient(cache=ResponseCache())
 
         start_time = time.time()
         answer = llm_client.generate_answer(question, context_chunks)
@@ -303,7 +305,7 @@ The system supports multiple retrieval strategies...
             last_character_index=100
         )
         print(f"✓ Created MinimalSource:")
-        print(f"  {json.dumps(source.dict(), indent=2)}")
+        print(f"  {json.dumps(source.model_dump(), indent=2)}")
 
         self.print_subsection("5.2 Search Results Model")
         search_results = StudentSearchResults(
@@ -316,7 +318,7 @@ The system supports multiple retrieval strategies...
             k=10
         )
         print(f"✓ Created StudentSearchResults:")
-        print(f"  {json.dumps(search_results.dict(), indent=2)}")
+        print(f"  {json.dumps(search_results.model_dump(), indent=2)}")
 
         self.print_subsection("5.3 Answer Results Model")
         answer_results = StudentSearchResultsAndAnswer(
@@ -330,7 +332,7 @@ The system supports multiple retrieval strategies...
             k=10
         )
         print(f"✓ Created StudentSearchResultsAndAnswer:")
-        print(f"  {json.dumps(answer_results.dict(), indent=2)[:200]}...")
+        print(f"  {json.dumps(answer_results.model_dump(), indent=2)[:200]}...")
 
         # Save to file
         output_dir = Path("data/output/test_results")
@@ -338,7 +340,7 @@ The system supports multiple retrieval strategies...
 
         output_file = output_dir / "test_answer.json"
         with open(output_file, 'w') as f:
-            json.dump(answer_results.dict(), f, indent=2)
+            json.dump(answer_results.model_dump(), f, indent=2)
 
         print(f"\n✓ Saved structured output to: {output_file}")
 
@@ -417,6 +419,62 @@ The system supports multiple retrieval strategies...
 
         self.results["tests_passed"] += 1
 
+    def test_8_concurrent_answering(self):
+        """Check pipelined answering against a local mock LLM server"""
+        self.print_section("TEST 8: Concurrent Answering (mock LLM server)")
+
+        import asyncio
+        from src.generation.mock_server import start_server
+        from src.pipeline.async_answering import answer_pipelined
+
+        concurrency = 3
+        # The first two requests fail and must be retried by the client
+        server = start_server(latency=0.05, failures=2, echo=True)
+        client = OllamaClient(host=f"http://127.0.0.1:{server.server_port}")
+        questions = [{'question_id': f"q{i}", 'question': f"What is item {i}?"}
+                     for i in range(12)]
+
+        async def generate(question, retrieved):
+            return await client.agenerate_answer(
+                question['question'],
+                [{'file_path': "item.py", 'content': retrieved,
+                  'start_char': 0, 'end_char': len(retrieved)}])
+
+        async def run():
+            try:
+                return await answer_pipelined(
+                    questions, lambda q: q['question_id'], generate,
+                    concurrency=concurrency)
+            finally:
+                await client.aclose()
+
+        start_time = time.time()
+        try:
+            results = asyncio.run(run())
+        finally:
+            server.shutdown()
+        elapsed = time.time() - start_time
+        stats = server.stats
+
+        checks = {
+            "answers in dataset order": results == [
+                (q['question_id'], q['question']) for q in questions],
+            f"at most {concurrency} requests in flight":
+                stats['max_in_flight'] <= concurrency,
+            "failed requests retried": stats['failed'] == 2
+                and stats['chat_requests'] == len(questions) + 2,
+        }
+        for name, passed in checks.items():
+            print(f"{'✓' if passed else '✗'} {name}")
+        print(f"  {len(questions)} questions, {stats['chat_requests']} "
+              f"requests, max {stats['max_in_flight']} in flight, "
+              f"{elapsed:.2f}s")
+
+        if all(checks.values()):
+            self.results["tests_passed"] += 1
+        else:
+            self.results["tests_failed"] += 1
+
     def generate_report(self):
         """Generate comprehensive test report"""
         self.print_section("TEST REPORT SUMMARY")
@@ -475,6 +533,7 @@ def main():
         tester.test_5_structured_json_output()
         tester.test_6_cli_interface()
         tester.test_7_evaluation_metrics()
+        tester.test_8_concurrent_answering()
 
     except Exception as e:
         print(f"\n✗ Test failed with error: {e}")
@@ -12,6 +12,7 @@ from pathlib import Path
 from src.indexing.indexer import RepositoryIndexer
 from src.retrieval.bm25 import BM25Retriever
 from src.generation.llm_client import OllamaClient
+from src.generation.cache import ResponseCache
 from src.models.data_models import *
 
 
@@ -156,7 +157,7 @@ class VLLMTester:
 
         # Check Ollama
         try:
-            llm_client = OllamaClient()
+            llm_client = OllamaClient(cache=ResponseCache())
             print("✓ Ollama connection successful")
         except Exception as e:
             print(f"⚠ Ollama not available: {e}")